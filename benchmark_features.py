@@ -0,0 +1,240 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##           BENCHMARK_FEATURES.PY            ##    
+================================================ 
+
+Benchmarks librosa_features on the bundled ./data windows.
+
+Compares the old featurizer (every librosa call rebuilds its own
+STFT / mel spectrogram / onset envelope / CQT from y) against the
+FeatureGraph, which computes each shared intermediate once per window.
+Both paths are checked to produce the same feature vector.
+
+Also compares featurizing each timesplit window of ./load_dir/fast.wav on
+its own against computing the frame features once for the whole recording
+and pooling them per window (librosa_featurize_windows), and featurizing
+the same windows as one (n_windows, n_samples) batch (librosa_featurize_batch).
+
+Finally prints where the time goes per window: a FeatureCosts table with the
+calls, time share and p50 / p90 / p99 milliseconds of every feature graph node,
+plus the peak memory each node allocates.
+
+Usage: python3 benchmark_features.py [number of windows] [timesplit]
+'''
+import glob, os, sys, time
+import librosa
+import numpy as np
+import librosa_features as lf
+
+# the featurizer as it was before the FeatureGraph: each call works from y
+def independent_featurize(y, sr):
+    mfcc=librosa.feature.mfcc(y=y, sr=sr)
+    poly_features=librosa.feature.poly_features(y=y, sr=sr)
+    chroma_cens=librosa.feature.chroma_cens(y=y, sr=sr)
+    chroma_cqt=librosa.feature.chroma_cqt(y=y, sr=sr)
+    chroma_stft=librosa.feature.chroma_stft(y=y, sr=sr)
+    tempogram=librosa.feature.tempogram(y=y, sr=sr)
+    spectral_centroid=librosa.feature.spectral_centroid(y=y, sr=sr)[0]
+    spectral_bandwidth=librosa.feature.spectral_bandwidth(y=y, sr=sr)[0]
+    spectral_contrast=librosa.feature.spectral_contrast(y=y, sr=sr)[0]
+    spectral_flatness=librosa.feature.spectral_flatness(y=y)[0]
+    spectral_rolloff=librosa.feature.spectral_rolloff(y=y, sr=sr)[0]
+    onset=librosa.onset.onset_detect(y=y, sr=sr)
+    tempo=librosa.beat.tempo(y=y, sr=sr)[0]
+    onset_strength=librosa.onset.onset_strength(y=y, sr=sr)
+    zero_crossings=librosa.feature.zero_crossing_rate(y)[0]
+    rmse=librosa.feature.rms(y=y)[0]
+
+    onset_features=np.concatenate([[len(onset)], lf.stats(onset), [tempo], lf.stats(onset_strength)])
+    rhythm_features=np.concatenate([lf.stats(tempogram[i]) for i in range(13)])
+    spectral_features=np.concatenate([lf.stats(mfcc[i]) for i in range(13)]+
+                                     [lf.stats(poly_features[0]),
+                                      lf.stats(poly_features[1]),
+                                      lf.stats(spectral_centroid),
+                                      lf.stats(spectral_bandwidth),
+                                      lf.stats(spectral_contrast),
+                                      lf.stats(spectral_flatness),
+                                      lf.stats(spectral_rolloff)])
+    power_features=np.concatenate([lf.stats(zero_crossings), lf.stats(rmse)])
+
+    return np.concatenate([onset_features, rhythm_features, spectral_features, power_features])
+
+def graph_featurize(y, sr):
+    features, labels = lf.graph_featurize(lf.FeatureGraph(y, sr), False)
+    return features
+
+# time a featurizer over all windows, returns milliseconds per window + outputs
+def time_featurizer(featurizer, signals):
+    outputs=list()
+    start=time.perf_counter()
+    for y, sr in signals:
+        outputs.append(featurizer(y, sr))
+    elapsed=time.perf_counter()-start
+    return 1000*elapsed/len(signals), outputs
+
+# featurize each window of a recording on its own (in memory, no wav writes)
+def window_featurize(y, sr, onsets, offsets):
+    features=list()
+    for i in range(len(onsets)):
+        window=y[int(round(onsets[i]*sr)):int(round(offsets[i]*sr))]
+        features.append(graph_featurize(window, sr))
+    return np.array(features)
+
+def pooled_featurize(y, sr, onsets, offsets):
+    return lf.pooled_featurize(lf.FeatureGraph(y, sr), onsets, offsets)
+
+# stats of the frame tracks of a recording over each window, one window at a
+# time (what pooling cost before rolling_stats shared work between windows)
+def window_stats(tracks, starts, stops):
+    return np.stack([lf.stats(tracks[:,starts[i]:stops[i]], axis=-1).reshape(-1) for i in range(len(starts))])
+
+def batch_featurize(y, sr, timesplit):
+    features, labels = lf.graph_featurize(lf.FeatureGraph(lf.window_view(y, sr, timesplit), sr), False)
+    return features
+
+def load_windows(number):
+    hostdir=os.path.dirname(os.path.abspath(__file__))
+    wavfiles=sorted(glob.glob(hostdir+'/data/*/*.wav'))[0:number]
+    signals=list()
+    for wavfile in wavfiles:
+        signals.append(librosa.load(wavfile))
+    return signals
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        number=int(sys.argv[1])
+    else:
+        number=50
+    if len(sys.argv) > 2:
+        timesplit=float(sys.argv[2])
+    else:
+        timesplit=0.2
+
+    signals=load_windows(number)
+    print('benchmarking %s windows (%s samples each @ %s Hz)'%(len(signals), len(signals[0][0]), signals[0][1]))
+
+    # warm up librosa's filterbank caches so neither path pays for them
+    graph_featurize(*signals[0])
+    independent_featurize(*signals[0])
+
+    independent_ms, independent_outputs = time_featurizer(independent_featurize, signals)
+    graph_ms, graph_outputs = time_featurizer(graph_featurize, signals)
+
+    for i in range(len(signals)):
+        assert np.array_equal(independent_outputs[i], graph_outputs[i]), 'feature mismatch on window %s'%(str(i))
+
+    print('independent calls: %.2f ms / window'%(independent_ms))
+    print('feature graph:     %.2f ms / window'%(graph_ms))
+    print('speedup:           %.2fx (identical feature vectors)'%(independent_ms/graph_ms))
+
+    # whole-recording frame features pooled into timesplit windows
+    hostdir=os.path.dirname(os.path.abspath(__file__))
+    y, sr = librosa.load(hostdir+'/load_dir/fast.wav')
+    onsets, offsets = lf.window_bounds(len(y)/sr, timesplit)
+    print('\nbenchmarking %s windows of %s seconds in load_dir/fast.wav'%(len(onsets), str(timesplit)))
+    pooled_featurize(y, sr, onsets, offsets)
+
+    start=time.perf_counter()
+    window_featurize(y, sr, onsets, offsets)
+    window_ms=1000*(time.perf_counter()-start)/len(onsets)
+    start=time.perf_counter()
+    pooled_featurize(y, sr, onsets, offsets)
+    pooled_ms=1000*(time.perf_counter()-start)/len(onsets)
+
+    print('per-window featurize: %.2f ms / window'%(window_ms))
+    print('whole-recording pool: %.2f ms / window'%(pooled_ms))
+    print('speedup:              %.2fx'%(window_ms/pooled_ms))
+
+    # half-overlapped windows (overlapping in settings.json): rolling_stats
+    # shares the stats work of neighbouring windows
+    graph=lf.FeatureGraph(y, sr)
+    tracks=np.vstack([track for category in lf.categories for track in lf.frame_tracks(graph)[category]])
+    n_frames=1+len(y)//lf.hop_length
+    for hop in [timesplit, timesplit/2, timesplit/8]:
+        hop_onsets, hop_offsets = lf.window_bounds(len(y)/sr, timesplit, hop)
+        starts, stops = lf.window_frames(hop_onsets, hop_offsets, sr, n_frames)
+        start=time.perf_counter()
+        separate=window_stats(tracks, starts, stops)
+        separate_ms=1000*(time.perf_counter()-start)
+        start=time.perf_counter()
+        rolling=lf.rolling_stats(tracks, starts, stops)
+        rolling_ms=1000*(time.perf_counter()-start)
+        assert np.allclose(rolling, separate, rtol=1e-5, atol=1e-6), 'rolling stats differ from per-window stats'
+        print('stats of %s windows (hop %s s): %.2f ms one window at a time, %.2f ms rolling (%.2fx)'%(len(starts), str(hop), separate_ms, rolling_ms, separate_ms/rolling_ms))
+
+    # the same windows featurized as one batch along a leading axis
+    batch_featurize(y, sr, timesplit)
+    start=time.perf_counter()
+    batch_features=batch_featurize(y, sr, timesplit)
+    batch_ms=1000*(time.perf_counter()-start)/len(batch_features)
+    window_features=window_featurize(y, sr, np.arange(len(batch_features))*timesplit, np.arange(1,len(batch_features)+1)*timesplit)
+    assert np.allclose(batch_features, window_features, rtol=1e-4, atol=1e-5), 'batch features differ from per-window features'
+
+    print('batched featurize:    %.2f ms / window'%(batch_ms))
+    print('speedup:              %.2fx (same features as per-window)'%(window_ms/batch_ms))
+
+    # time + memory of each feature graph node (per window; memory tracing
+    # slows every step down, so the times are measured without it first)
+    costs=lf.FeatureCosts()
+    for y, sr in signals:
+        lf.graph_featurize(lf.FeatureGraph(y, sr, costs=costs), False)
+    print('\ncost per feature graph step (%s windows):'%(len(signals)))
+    print(costs.table())
+    costs=lf.FeatureCosts(memory=True)
+    for y, sr in signals:
+        lf.graph_featurize(lf.FeatureGraph(y, sr, costs=costs), False)
+    print('\npeak memory per feature graph step (traced):')
+    print(costs.table())
@@ -0,0 +1,618 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##            EVENT_DETECTION.PY              ##    
+================================================ 
+
+Detects sound events in audio with the trained models of a folder, as a
+library: detect_events(audio_or_path, models, settings) featurizes an audio
+file (absolute path) or an in-memory signal into timesplit windows, models
+every window with each model and returns the window predictions, the events
+(runs of windows with the same class) and the event stats as records.
+
+Nothing here changes the working directory or reads module-level state, so
+detect_events can run in several threads at once (sharing one ModelRegistry)
+and be called any number of times from one process. load_audioTPOT.py and
+watch_audioTPOT.py are thin wrappers around it.
+'''
+import json, math, os, tempfile
+import librosa
+import numpy as np
+import pandas as pd
+import soundfile as sf
+import soxr
+import librosa_features as lf
+from model_registry import ModelRegistry
+
+# the settings.json keys, with the defaults of label_files.py (for settings
+# dicts and settings.json files written before a key was added)
+default_settings={'overlapping': False,
+                  'frame_pooling': False,
+                  'feature_cache': True,
+                  'feature_cache_size': 512,
+                  'analysis_sr': 22050,
+                  'resample_type': 'soxr_hq',
+                  'feature_profile': 'full',
+                  'rhythm_context': 0,
+                  'feature_dtype': 'float64',
+                  'feature_costs': False,
+                  'feature_budget': 5,
+                  'window_tail': 'drop',
+                  'stream_block': 0,
+                  'model_feature': True,
+                  'plot_feature': False,
+                  'probability_default': 0.8,
+                  'probability_labeltype': True,
+                  'timesplit': 0.2,
+                  'visualize_feature': True}
+
+# soxr quality of each soxr res_type (stream mode resamples block by block
+# with soxr; other res_types stream at soxr_hq)
+soxr_qualities={'soxr_vhq': 'VHQ', 'soxr_hq': 'HQ', 'soxr_mq': 'MQ', 'soxr_lq': 'LQ', 'soxr_qq': 'QQ'}
+
+# seconds of audio on each side of a block that its frame features are
+# computed over in stream mode with frame pooling (on top of rhythm_context):
+# covers the STFT frames + the 384 frame tempogram around the block's windows
+stream_margin=5
+
+# windows featurized in one batch (bounds the memory of the batched STFT on
+# long files)
+batch_size=256
+
+# a settings.json, with the default of every key it leaves out
+def read_settings(path):
+    with open(path) as f:
+        return dict(default_settings, **json.load(f))
+
+# get statistical features in numpy
+def stats(matrix):
+
+    try:
+        mean=np.mean(matrix)
+        std=np.std(matrix)
+        maxv=np.amax(matrix)
+        minv=np.amin(matrix)
+        median=np.median(matrix)
+
+        output=np.array([mean,std,maxv,minv,median])
+    except:
+        output='error'
+    
+    return output
+
+# the setup a detection run needs from settings (a settings.json dict) and the
+# models of a ModelRegistry: decoded settings, model names + profiles and the
+# union of the feature columns the models read (None = every column).
+# Models without a record of their columns read every column of their
+# profile; models without a profile use the full profile. The model setup is
+# built again before a detection when the models changed (a model added to or
+# removed from the folder without names, or retrained with other columns)
+class Detection:
+
+    def __init__(self, models, settings, names=None, cache=None, costs=None):
+        settings=dict(default_settings, **settings)
+        self.models=models
+        self.settings=settings
+        self.timesplit=settings['timesplit']
+        self.analysis_sr=lf.settings_sr(settings['analysis_sr'])
+        self.resample_type=settings['resample_type']
+        self.rhythm_context=settings['rhythm_context']
+        self.feature_dtype=lf.settings_dtype(settings['feature_dtype'])
+        self.window_tail=settings['window_tail']
+        self.stream_block=settings['stream_block']
+        self.pooled=settings['frame_pooling'] == True or self.rhythm_context > 0 or settings['overlapping'] == True
+        # overlapping windows start every half timesplit (as label_files.py splits them)
+        if settings['overlapping'] == True:
+            self.window_hop=self.timesplit/2
+        else:
+            self.window_hop=self.timesplit
+        if settings['feature_budget'] > 0:
+            self.budget=settings['feature_budget']
+        else:
+            self.budget=None
+        if cache is None and settings['feature_cache'] == True:
+            cache=lf.FeatureCache(max_mb=settings['feature_cache_size'])
+        self.cache=cache
+        self.costs=costs
+
+        # features are computed once in the full layout (only the columns the
+        # models need) and each model reads the columns of its own profile
+        full_labels=lf.flat_labels()
+        self.profile_columns=dict()
+        for profile in lf.profiles:
+            self.profile_columns[profile]=[full_labels.index(label) for label in lf.flat_labels(profile)]
+
+        # the models picked (None = every model of the folder) + the (name,
+        # stamp, digest) of the models the setup was built from
+        self.picked=names
+        self.built=None
+        self.update()
+
+    # build the model names, profiles + feature columns again if the models
+    # changed since they were built; returns whether they were
+    def update(self):
+        if self.picked is None:
+            names=self.models.names()
+        else:
+            self.models.refresh()
+            names=list(self.picked)
+        infos=[self.models.info(name) for name in names]
+        built=[(name, info['stamp'], info['digest']) for name, info in zip(names, infos)]
+        if built == self.built:
+            return False
+
+        self.names=names
+        self.profiles=list()
+        feature_columns=list()
+        for info in infos:
+            self.profiles.append(info['feature_profile'])
+            model_columns=info['feature_columns']
+            if model_columns is None:
+                model_columns=lf.flat_labels(info['feature_profile'])
+            feature_columns=sorted(set(feature_columns+model_columns))
+        if len(feature_columns) == len(lf.flat_labels()):
+            feature_columns=None
+        self.feature_columns=feature_columns
+        self.built=built
+        return True
+
+    # models trained with another analysis sample rate or rhythm context than
+    # the settings (their features would not match)
+    def warnings(self):
+        warnings=list()
+        for name in self.names:
+            info=self.models.info(name)
+            # models without this metadata were trained at 22050 Hz
+            if lf.settings_sr(info['analysis_sr']) != self.analysis_sr:
+                warnings.append('%s was trained on features at %s Hz, but analysis_sr is %s in settings.json'%(name, str(info['analysis_sr']), str(self.settings['analysis_sr'])))
+            if info['rhythm_context'] != self.rhythm_context:
+                warnings.append('%s was trained with a rhythm_context of %s s, but rhythm_context is %s in settings.json'%(name, str(info['rhythm_context']), str(self.rhythm_context)))
+        return warnings
+
+    # the samples of a path (decoded at analysis_sr) or of a signal at sample
+    # rate sr (resampled to analysis_sr); (frames, channels) signals, as
+    # soundfile reads them, are mixed down to mono
+    def load(self, audio, sr=None):
+        if isinstance(audio, (str, os.PathLike)):
+            if self.costs is not None:
+                self.costs.start('decode')
+            y, sr = lf.load_audio(audio, self.analysis_sr, self.resample_type)
+            if self.costs is not None:
+                self.costs.stop()
+            return y, sr
+        y=np.asarray(audio)
+        if y.ndim == 2:
+            y=np.mean(y, axis=1)
+        elif y.ndim != 1:
+            raise ValueError('an in-memory signal must be (frames,) or (frames, channels), not %s'%(str(y.shape)))
+        if sr is None:
+            raise ValueError('the sample rate (sr) of an in-memory signal is needed')
+        if self.analysis_sr is not None and sr != self.analysis_sr:
+            y=librosa.resample(y, orig_sr=sr, target_sr=self.analysis_sr, res_type=self.resample_type)
+            sr=self.analysis_sr
+        return y, sr
+
+    # (n_windows, n_features), onsets, offsets + the windows with feature groups
+    # that failed (output as 0s)
+    def featurize(self, audio, sr=None):
+        feature_failures=list()
+        if self.pooled == True:
+            # compute frame features once for the whole recording + pool them
+            # into timesplit windows; rhythm features with context need the
+            # whole recording, and overlapping windows share their stats work,
+            # so they always take this path
+            if isinstance(audio, (str, os.PathLike)):
+                features, labels, onsets, offsets = lf.librosa_featurize_windows(audio, self.timesplit, self.analysis_sr, self.resample_type,
+                                                                                 self.feature_columns, context=self.rhythm_context, dtype=self.feature_dtype,
+                                                                                 costs=self.costs, hop=self.window_hop, cache=self.cache, tail=self.window_tail)
+            else:
+                y, sr = self.load(audio, sr)
+                features, labels, onsets, offsets = lf.librosa_featurize_signal_windows(y, sr, self.timesplit, self.feature_columns, context=self.rhythm_context,
+                                                                                        dtype=self.feature_dtype, costs=self.costs, hop=self.window_hop, tail=self.window_tail)
+            return features, onsets, offsets, feature_failures
+
+        # decode once + slice the timesplit windows out of the samples (views,
+        # nothing is written to disk); the audio after the last whole window is
+        # handled as window_tail says (drop, keep or pad)
+        y, sr = self.load(audio, sr)
+        onsets, offsets = lf.window_bounds(len(y)/sr, self.timesplit, tail=self.window_tail)
+        segments=lf.window_slices(y, sr, onsets, offsets)
+        features, feature_failures = self.featurize_segments(segments, sr, onsets, offsets)
+
+        return features, onsets, offsets, feature_failures
+
+    # featurize the samples of windows (onsets/offsets in seconds): windows of
+    # the same length are featurized batch_size at a time along a batch axis
+    # (librosa_featurize_batch). With a feature_budget, every feature group of
+    # a batch gets the budget of one window (a batch of ordinary windows takes
+    # a fraction of it), and only a batch with a group that fails or runs past
+    # it is featurized again window by window, so the windows at fault are
+    # found and only their groups are 0s
+    def featurize_segments(self, segments, sr, onsets, offsets):
+        feature_failures=list()
+        features=np.zeros((len(segments), len(lf.flat_labels())), dtype=self.feature_dtype)
+        lengths=np.array([len(segment) for segment in segments], dtype=int)
+        for length in np.unique(lengths):
+            windows=np.flatnonzero(lengths == length)
+            for i in range(0, len(windows), batch_size):
+                batch=windows[i:i+batch_size]
+                failures=dict()
+                features[batch], labels = lf.librosa_featurize_batch([segments[j] for j in batch], sr, dtype=self.feature_dtype,
+                                                                     costs=self.costs, columns=self.feature_columns, cache=self.cache,
+                                                                     budget=self.budget, failures=failures)
+                if len(failures) > 0:
+                    for j in batch:
+                        features[j]=self.featurize_window(segments[j], sr, onsets[j], offsets[j], feature_failures)
+
+        return features, feature_failures
+
+    # featurize one window within feature_budget; feature groups that fail or
+    # run past it are 0s + listed in feature_failures
+    def featurize_window(self, segment, sr, onset, offset, feature_failures):
+        failures=dict()
+        features, labels = lf.librosa_featurize_signal(segment, sr, False, self.cache, self.feature_columns, dtype=self.feature_dtype,
+                                                       costs=self.costs, budget=self.budget, failures=failures)
+        if len(failures) > 0:
+            print('warning: features of %s-%s s failed and were set to 0: %s'%(str(onset), str(offset), str(failures)))
+            feature_failures.append({'onset': float(onset),
+                                     'offset': float(offset),
+                                     'failures': failures})
+        return features
+
+    # STREAM MODE
+    ######################################################
+    # blocks of samples of a file at the analysis sample rate: read stream_block
+    # seconds at a time with soundfile, downmixed to mono + resampled with a
+    # soxr stream (so the blocks join up as if the file was resampled at once);
+    # returns the sample rate + a generator of (block, last)
+    def read_blocks(self, path):
+        info=sf.info(path)
+        sr=info.samplerate
+        if self.analysis_sr is not None and self.analysis_sr != sr:
+            resampler=soxr.ResampleStream(sr, self.analysis_sr, 1, dtype='float32',
+                                          quality=soxr_qualities.get(self.resample_type, 'HQ'))
+        else:
+            resampler=None
+        block_frames=int(math.ceil(self.stream_block*sr))
+
+        def blocks():
+            with sf.SoundFile(path) as f:
+                while True:
+                    if self.costs is not None:
+                        self.costs.start('decode')
+                    block=f.read(block_frames, dtype='float32', always_2d=True)
+                    last=f.tell() >= f.frames or len(block) < block_frames
+                    block=np.mean(block, axis=1)
+                    if resampler is not None:
+                        block=resampler.resample_chunk(block, last=last)
+                    if self.costs is not None:
+                        self.costs.stop()
+                    yield block, last
+                    if last == True:
+                        return
+
+        if resampler is not None:
+            sr=self.analysis_sr
+        return sr, blocks()
+
+    # featurize the windows of a file as its blocks are read: yields the
+    # (n_windows, n_features), onsets, offsets + feature failures of the windows
+    # that complete in each block. Only about one block of samples is held
+    # (plus the margins around it with frame pooling), however long the file is
+    def stream(self, path):
+        sr, blocks = self.read_blocks(path)
+        # samples read but not used up yet; buffer[0] is sample buffer_start of the file
+        buffer=np.zeros(0, dtype=np.float32)
+        buffer_start=0
+        # the next window to featurize
+        k=0
+        if self.pooled == True:
+            # frame pooling: the windows starting in a block are pooled from the
+            # frame features of the block + margin samples on each side (blocks
+            # are whole frames, so the frames of a block are frames of the file)
+            block_length=max(int(round(self.stream_block*sr/lf.hop_length)), 1)*lf.hop_length
+            margin=int(math.ceil((self.rhythm_context+stream_margin)*sr/lf.hop_length))*lf.hop_length
+            reach=int(math.ceil(self.timesplit*sr))+margin
+            groups=lf.profile_groups('full', self.feature_columns)
+            block_start=0
+
+        for block, last in blocks:
+            buffer=np.concatenate([buffer, block])
+            buffer_stop=buffer_start+len(buffer)
+
+            while True:
+                final=False
+                if self.pooled == True and buffer_stop >= block_start+block_length+reach:
+                    # a whole block with its margins
+                    stop=k
+                    while int(round(stop*self.window_hop*sr)) < block_start+block_length:
+                        stop=stop+1
+                    onsets=np.arange(k, stop)*self.window_hop
+                    offsets=onsets+self.timesplit
+                    graph_stop=block_start+block_length+reach
+                elif last == True:
+                    # every window left, with the tail of the file
+                    onsets, offsets = lf.window_bounds(buffer_stop/sr, self.timesplit, self.window_hop, self.window_tail)
+                    onsets=onsets[k:]
+                    offsets=offsets[k:]
+                    graph_stop=buffer_stop
+                    final=True
+                    if len(onsets) == 0:
+                        break
+                elif self.pooled == True:
+                    break
+                else:
+                    # the windows whose samples are all read
+                    stop=k
+                    while int(round(stop*self.window_hop*sr))+int(round(self.timesplit*sr)) <= buffer_stop:
+                        stop=stop+1
+                    onsets=np.arange(k, stop)*self.window_hop
+                    offsets=onsets+self.timesplit
+
+                feature_failures=list()
+                if self.pooled == True:
+                    graph_start=max(block_start-margin, 0)
+                    if len(onsets) > 0:
+                        graph=lf.FeatureGraph(buffer[graph_start-buffer_start:graph_stop-buffer_start], sr, self.feature_dtype, self.costs)
+                        features=lf.pooled_featurize(graph, onsets, offsets, groups, 'full', self.rhythm_context, graph_start//lf.hop_length)
+                    block_start=block_start+block_length
+                    keep_start=block_start-margin
+                else:
+                    if len(onsets) > 0:
+                        segments=lf.window_slices(buffer, sr, onsets-buffer_start/sr, offsets-buffer_start/sr)
+                        features, feature_failures = self.featurize_segments(segments, sr, onsets, offsets)
+                    keep_start=int(round((k+len(onsets))*self.window_hop*sr))
+
+                # drop the samples no window left needs
+                k=k+len(onsets)
+                keep_start=min(max(keep_start, buffer_start), buffer_stop)
+                buffer=buffer[keep_start-buffer_start:].copy()
+                buffer_start=keep_start
+                if len(onsets) > 0:
+                    yield features, onsets, offsets, feature_failures
+
+                if final == True or self.pooled == False:
+                    break
+
+    # model every window (features: (n_windows, n_features)) with one call per
+    # model. The probability of a window is the predict_proba of the class the
+    # model picked; models without predict_proba (e.g. regressors) get their
+    # test accuracy from training instead. returns per model: the class (index
+    # into its classes) + probability of every window
+    def predict(self, features):
+        class_indices=list()
+        class_probabilities=list()
+
+        for y in range(len(self.names)):
+            info=self.models.info(self.names[y])
+            model=self.models.get(self.names[y])
+
+            # model the features (on the columns of the model's feature profile)
+            model_features=features[:,self.profile_columns[self.profiles[y]]]
+            if hasattr(model, 'predict_proba'):
+                probability=model.predict_proba(model_features)
+                best=np.argmax(probability, axis=1)
+                outputs=np.asarray(model.classes_)[best]
+                probability=probability[np.arange(len(best)), best]
+            else:
+                outputs=model.predict(model_features)
+                probability=np.full(len(outputs), info['accuracy'], dtype=float)
+
+            class_indices.append(np.asarray(outputs, dtype=float).astype(int))
+            class_probabilities.append(np.asarray(probability, dtype=float))
+
+        return class_indices, class_probabilities
+
+    # events (runs of a class) of one model + the duration stats of every class.
+    # An event runs from the onset of its first window to the offset of its
+    # last window; its probability is the mean probability of its windows
+    def model_events(self, filename, modelname, indices, probabilities, onsets, offsets):
+        info=self.models.info(modelname)
+        classes=info['classes']
+        starts, stops, run_classes = event_runs(indices)
+        event_onsets=onsets[starts]
+        event_offsets=offsets[stops-1]
+        durations=event_offsets-event_onsets
+        event_probabilities=np.add.reduceat(probabilities, starts)/(stops-starts)
+
+        events=list()
+        for i in range(len(starts)):
+            events.append({'onset': float(event_onsets[i]),
+                           'offset': float(event_offsets[i]),
+                           'event': classes[run_classes[i]],
+                           'probability': float(event_probabilities[i]),
+                           'model': modelname})
+
+        # total length counts each window hop once (overlapping windows share time)
+        window_counts=np.bincount(indices, minlength=len(classes))
+        event_datas=list()
+        for k in range(len(classes)):
+            class_durations=durations[run_classes == k]
+            if len(class_durations) > 0:
+                event_stats=stats(class_durations)
+            else:
+                event_stats=np.zeros(5)
+            event_datas.append({'filename': filename,
+                                'total_length': float(window_counts[k]*self.window_hop),
+                                'event': classes[k],
+                                'events': len(class_durations),
+                                'mean': float(event_stats[0]),
+                                'std': float(event_stats[1]),
+                                'max': float(event_stats[2]),
+                                'min': float(event_stats[3]),
+                                'median': float(event_stats[4]),
+                                'model': modelname,
+                                'model accuracy': info['accuracy'],
+                                'possible classes': classes,
+                                'window': self.timesplit})
+
+        return events, event_datas
+
+    def detect(self, audio, sr=None, filename=None):
+        if filename is None and isinstance(audio, (str, os.PathLike)):
+            filename=os.path.basename(audio)
+        self.update()
+        class_indices=None
+        class_probabilities=None
+
+        if self.stream_block > 0 and isinstance(audio, (str, os.PathLike)):
+            # stream mode: the windows of each block are modeled as soon as they
+            # are featurized (one call per model per block); only their classes,
+            # probabilities + times are kept
+            blocks=list()
+            feature_failures=list()
+            for features, onsets, offsets, failures in self.stream(audio):
+                class_indices, class_probabilities = self.predict(features)
+                blocks.append((onsets, offsets, class_indices, class_probabilities))
+                feature_failures.extend(failures)
+            onsets=np.concatenate([np.zeros(0)]+[block[0] for block in blocks])
+            offsets=np.concatenate([np.zeros(0)]+[block[1] for block in blocks])
+            if len(blocks) > 0:
+                class_indices=[np.concatenate([block[2][j] for block in blocks]) for j in range(len(self.names))]
+                class_probabilities=[np.concatenate([block[3][j] for block in blocks]) for j in range(len(self.names))]
+        else:
+            features, onsets, offsets, feature_failures = self.featurize(audio, sr)
+            if len(features) > 0:
+                # model all the windows at once (one call per model)
+                class_indices, class_probabilities = self.predict(features)
+
+        return self.records(filename, np.asarray(onsets, dtype=float), np.asarray(offsets, dtype=float),
+                            class_indices, class_probabilities, feature_failures)
+
+    # the records of detect_events from the class (index) + probability of every
+    # window of each model
+    def records(self, filename, onsets, offsets, class_indices, class_probabilities, feature_failures):
+        windows=list()
+        events=list()
+        event_datas=list()
+        if len(onsets) > 0:
+            # a window record per window per model + the events of each model
+            # and the duration stats of each class, in one pass over its classes
+            for j in range(len(self.names)):
+                labels=np.asarray(self.models.info(self.names[j])['classes'])[class_indices[j]]
+                for onset, offset, label, probability in zip(onsets.tolist(), offsets.tolist(), labels.tolist(), class_probabilities[j].tolist()):
+                    windows.append({'onset': onset,
+                                    'offset': offset,
+                                    'event': label,
+                                    'probability': probability,
+                                    'model': self.names[j]})
+                model_event_list, model_event_datas = self.model_events(filename, self.names[j], class_indices[j],
+                                                                        class_probabilities[j], onsets, offsets)
+                events.extend(model_event_list)
+                event_datas.extend(model_event_datas)
+
+        return {'filename': filename,
+                'windows': windows,
+                'events': events,
+                'event_data': event_datas,
+                'feature_failures': feature_failures}
+
+# run-length encode the classes of consecutive windows: the first + last window
+# (exclusive) and the class of every run of windows with the same class
+def event_runs(indices):
+    changes=np.flatnonzero(indices[1:] != indices[:-1])+1
+    starts=np.concatenate([[0], changes])
+    stops=np.concatenate([changes, [len(indices)]])
+    return starts, stops, indices[starts]
+
+# detect the events in audio_or_path (an absolute path, or samples at sample
+# rate sr, mono or (frames, channels)) with models (a ModelRegistry, or the
+# path of a model folder) and settings (a settings.json dict; missing keys get
+# the label_files.py defaults). names picks some of the models (default: all of them); cache (a
+# FeatureCache) overrides the feature_cache setting and costs (a FeatureCosts)
+# records the cost of every featurizing step. returns a dict of records:
+#   windows: {onset, offset, event, probability, model} per window per model
+#   events: {onset, offset, event, probability, model} per run of windows
+#           with the same class
+#   event_data: duration stats per class per model
+#   feature_failures: windows with feature groups that failed (set to 0)
+def detect_events(audio_or_path, models, settings, sr=None, names=None, cache=None, costs=None, filename=None):
+    if isinstance(models, (str, os.PathLike)):
+        models=ModelRegistry(models)
+    return Detection(models, settings, names, cache, costs).detect(audio_or_path, sr, filename)
+
+# write a file through write(f) into a temporary file next to it + rename it
+# into place (so readers only ever see the whole file)
+def write_atomic(path, write):
+    f=tempfile.NamedTemporaryFile('w', dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp', delete=False)
+    try:
+        with f:
+            write(f)
+        os.replace(f.name, path)
+    except:
+        if os.path.exists(f.name):
+            os.remove(f.name)
+        raise
+
+# write the records of detect_events to a .CSV (a row per window per model, in
+# the filename / onset / offset / event_label / probability schema of the
+# annotations) + a .JSON of the events and their stats; the .JSON is written
+# last, so a file with a .JSON is done. A file without windows (shorter than
+# one window) only gets a .JSON with no events, to mark it done
+def write_outputs(records, csvfilename, jsonfilename):
+    windows=records['windows']
+    if len(windows) > 0:
+        df = pd.DataFrame({'filename': [os.path.basename(csvfilename)]*len(windows),
+                           'onset': np.array([window['onset'] for window in windows]),
+                           'offset': np.array([window['offset'] for window in windows]),
+                           'event_label': np.array([window['event']+'_prediction' for window in windows]),
+                           'probability': np.array([window['probability'] for window in windows])})
+        write_atomic(csvfilename, lambda f: df.to_csv(f))
+
+    data={'filename': records['filename'],
+          'event_data': records['event_data'],
+          'events': records['events'],
+          'feature_failures': records['feature_failures']}
+    write_atomic(jsonfilename, lambda f: json.dump(data, f))
@@ -63,6 +63,7 @@ from pydub import AudioSegment
 import matplotlib.pyplot as plt
 import pandas as pd 
 import numpy as np
+import event_detection as ed
 
 ###########################################################
 ## 		    			Settings					     ##
@@ -74,6 +75,63 @@ if 'settings.json' not in os.listdir():
         # True or False, allows for overlapping windows in labeling process
         overlapping=False
 
+        # frame pooling
+        # True or False, computes frame features once per recording and pools them
+        # into timesplit windows when modeling (instead of featurizing each window)
+        frame_pooling=False
+
+        # feature cache
+        # True or False, caches featurized audio on disk (./feature_cache) so the
+        # same audio is never featurized twice; feature_cache_size is the cap in MB
+        feature_cache=True
+        feature_cache_size=512
+
+        # analysis sample rate + resample type
+        # sample rate (Hz) audio is analyzed at, or "native" to keep each file's own rate;
+        # the resampler is one of librosa's res_type options (soxr_hq, soxr_mq, soxr_lq, polyphase...)
+        analysis_sr=22050
+        resample_type='soxr_hq'
+
+        # feature profile
+        # "full" (every feature) or "realtime" (only cheap spectral + power features)
+        # for the models you train; each model records the profile it was trained on
+        feature_profile='full'
+
+        # rhythm context
+        # seconds of the recording on each side of a window that its onset / tempo /
+        # tempogram features are computed over (0 = only the window itself); needs
+        # the whole recording, so it is applied in frame_pooling mode and training
+        # reads the recordings in ./processed
+        rhythm_context=0
+
+        # feature dtype
+        # "float32" computes, stores and models features in float32 (half the memory
+        # of float64); "float64" keeps the dtypes librosa returns
+        feature_dtype='float64'
+
+        # feature costs
+        # records the time + peak memory of every feature when load_audioTPOT.py
+        # featurizes, and prints a table of them at the end (True or False)
+        feature_costs=False
+
+        # feature budget
+        # seconds a feature (with the intermediates it needs) may take on a window
+        # in load_audioTPOT.py; features that run past it or fail are set to 0 and
+        # listed in the output .JSON (0 = no budget)
+        feature_budget=5
+
+        # window tail
+        # what load_audioTPOT.py does with the audio after the last whole timesplit
+        # window: "drop" it, "keep" it as a shorter window, or "pad" it with 0s
+        # into a whole window
+        window_tail='drop'
+
+        # stream block
+        # seconds of audio load_audioTPOT.py reads at a time (with soundfile) and
+        # models before reading more, so long files take constant memory
+        # (0 = decode each file at once)
+        stream_block=0
+
         # model feature
         # models data in the timesplit variable + plots onto .CSV file output 
         model_feature=True
@@ -103,6 +161,18 @@ if 'settings.json' not in os.listdir():
         # write all these to .JSON for future use 
         jsonfile=open('settings.json','w')
         data={'overlapping': overlapping,
+              'frame_pooling': frame_pooling,
+              'feature_cache': feature_cache,
+              'feature_cache_size': feature_cache_size,
+              'analysis_sr': analysis_sr,
+              'resample_type': resample_type,
+              'feature_profile': feature_profile,
+              'rhythm_context': rhythm_context,
+              'feature_dtype': feature_dtype,
+              'feature_costs': feature_costs,
+              'feature_budget': feature_budget,
+              'window_tail': window_tail,
+              'stream_block': stream_block,
               'model_feature': model_feature,
               'plot_feature': plot_feature,
               'probability_default': probability_default,
@@ -115,9 +185,21 @@ if 'settings.json' not in os.listdir():
 
 else:
         # load from memory if the file exists. Note the file should exist if you 
-        # cloned teh repository 
-        g=json.load(open('settings.json'))
+        # cloned teh repository (keys it predates get their defaults)
+        g=ed.read_settings('settings.json')
         overlapping = g['overlapping']
+        frame_pooling = g['frame_pooling']
+        feature_cache = g['feature_cache']
+        feature_cache_size = g['feature_cache_size']
+        analysis_sr = g['analysis_sr']
+        resample_type = g['resample_type']
+        feature_profile = g['feature_profile']
+        rhythm_context = g['rhythm_context']
+        feature_dtype = g['feature_dtype']
+        feature_costs = g['feature_costs']
+        feature_budget = g['feature_budget']
+        window_tail = g['window_tail']
+        stream_block = g['stream_block']
         model_feature = g['model_feature']
         plot_feature = g['plot_feature']
         probability_default = g['probability_default']
@@ -291,8 +373,12 @@ def split_segments(filename, timesplit, overlapping):
     # recommend >0.20 seconds for timesplit 
     hop_length = 512
     n_fft=2048 
-    y, sr = librosa.load(filename)
-    duration=float(librosa.core.get_duration(y=y, sr=sr))
+    # segments are exported at the analysis sample rate (no need to decode here)
+    if analysis_sr == 'native':
+        sr=librosa.get_samplerate(filename)
+    else:
+        sr=int(analysis_sr)
+    duration=float(librosa.get_duration(path=filename))
     print(duration)
     
     #Now splice an audio signal into individual elements of 20 ms and extract
@@ -301,36 +387,34 @@ def split_segments(filename, timesplit, overlapping):
     timesegment=list()
     time=0
 
-    if overlapping == False:
-        # non overlapping serial segments spliced by timesplit
-        for i in range(segnum):
-                #milliseconds
-                timesegment.append(time)
-                time=time+deltat*1000
-
-    elif overlapping == True:
+    # non overlapping serial segments spliced by timesplit
+    for i in range(segnum):
+            #milliseconds
+            timesegment.append(time)
+            time=time+deltat*1000
+    segments=list()
+    for i in range(len(timesegment)-1):
+            segments.append((timesegment[i], timesegment[i+1]))
 
-        for i in range(segnum):
-                # overlapping segments spliced by timesplit
-                if i ==0:
-                        timesegment.append(time)
-                        time=time+deltat*1000
-                else:
-                        timesegment.append(time)
-                        time=time-deltat*1000/2
-                        timesegment.append(time)
-                        time=time+deltat*1000
+    if overlapping == True:
+        # half-overlapped segments over the same span: timesplit long, starting
+        # every timesplit/2 (the windows load_audioTPOT.py models when overlapping)
+        segments=list()
+        for i in range(max(2*len(timesegment)-3, 0)):
+                start=i*deltat*1000/2
+                segments.append((start, start+deltat*1000))
 
     newAudio = AudioSegment.from_wav(filename)
     filelist=list()
     file=filename
 
     # store time data / startstop in parallel to audio file 
-    for i in range(len(timesegment)-1):
-        filename=exportfile(newAudio,timesegment[i],timesegment[i+1],file,i, sr)
+    for i in range(len(segments)):
+        filename=exportfile(newAudio,segments[i][0],segments[i][1],file,i, sr)
         jsonfile=open(filename[0:-4]+'.json','w')
-        data={'start':timesegment[i]/1000,
-                  'end': timesegment[i+1]/1000}
+        data={'start':segments[i][0]/1000,
+                  'end': segments[i][1]/1000,
+                  'source': file}
         json.dump(data,jsonfile)
         filelist.append(filename)
 
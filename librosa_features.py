@@ -64,18 +64,25 @@ in different classes: onset, rhythm, spectral, and power categories.
 Note this is quite a powerful audio feature set that can be used
 for a variety of purposes. 
 '''
+import csv, hashlib, io, json, multiprocessing, os, signal, tempfile, threading, time, tracemalloc, warnings
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
 import librosa
+import librosa.core.constantq
 import numpy as np 
+from scipy import ndimage
 
 # get statistical features in numpy
-def stats(matrix):
-    mean=np.mean(matrix)
-    std=np.std(matrix)
-    maxv=np.amax(matrix)
-    minv=np.amin(matrix)
-    median=np.median(matrix)
-
-    output=np.array([mean,std,maxv,minv,median])
+# (over the whole matrix, or along an axis for a batch of signals)
+def stats(matrix, axis=None):
+    mean=np.mean(matrix, axis=axis)
+    std=np.std(matrix, axis=axis)
+    maxv=np.amax(matrix, axis=axis)
+    minv=np.amin(matrix, axis=axis)
+    median=np.median(matrix, axis=axis)
+
+    output=np.stack([mean,std,maxv,minv,median], axis=-1)
     
     return output
 
@@ -94,136 +101,1553 @@ def stats_labels(label, sample_list):
 
     return sample_list
 
+# sample rate every file is decoded to before featurizing (librosa.load default);
+# None analyzes each file at its native sample rate
+analysis_sr=22050
+
+# resampler used to get to analysis_sr: 'soxr_hq' is librosa's default,
+# 'soxr_mq', 'soxr_lq', 'soxr_qq' and 'polyphase' are faster
+resample_type='soxr_hq'
+
+# bump whenever the feature layout or any parameter below changes, so that
+# features cached by an older version are never reused
+feature_version='1'
+
+# librosa defaults for the frame transforms (shared by every feature below)
+n_fft=2048
+hop_length=512
+
+# dynamic range of the log-mel spectrogram (librosa.power_to_db default)
+top_db=80.0
+
+# constant-Q settings used by the chroma_cqt and chroma_cens features
+cqt_octaves=7
+cqt_bins_per_octave=36
+
+# CONSTANT MATRICES
+######################################################
+# filterbanks, CQT kernels and windows only depend on the analysis parameters
+# (sr, n_fft, hop, bins), but librosa rebuilds them on every call, which costs
+# more than the transforms on a short window. They are built once per process
+# here (keyed on those parameters) and shared by every FeatureGraph.
+constants=dict()
+
+# get a constant matrix, building it with build_<name>(*key) on first use
+def constant(name, *key):
+    if (name,)+key not in constants:
+        constants[(name,)+key]=globals()['build_'+name](*key)
+    return constants[(name,)+key]
+
+def build_mel_basis(sr, n_fft):
+    return librosa.filters.mel(sr=sr, n_fft=n_fft)
+
+# (in dtype if given, so float32 frames are not promoted to float64)
+def build_window(length, dtype=None):
+    window=librosa.filters.get_window('hann', length, fftbins=True)
+    if dtype is not None:
+        window=window.astype(dtype)
+    return window
+
+# center frequencies of the STFT bins (in dtype if given: multiplying a float32
+# spectrogram by float64 frequencies makes float64 copies of the spectrogram)
+def build_frequencies(sr, n_fft, dtype=None):
+    frequencies=librosa.fft_frequencies(sr=sr, n_fft=n_fft)
+    if dtype is not None:
+        frequencies=frequencies.astype(dtype)
+    return frequencies
+
+# hashable form of an argument of librosa's CQT kernel builder
+def constant_key(value):
+    if isinstance(value, np.ndarray):
+        return (value.dtype.str, value.shape, value.tobytes())
+    return value
+
+# librosa.cqt builds the FFT kernels of every octave through this private
+# function on each call; cache_cqt_kernels() memoizes it in constants. No
+# feature vector uses the CQT, so this is opt-in (warm_up(cqt=True)) rather
+# than a side effect of importing this module. The caller rescales the kernel
+# in place, so every call gets its own copy of the cached kernel
+vqt_filter_fft=getattr(librosa.core.constantq, '__vqt_filter_fft', None)
+
+def cached_vqt_filter_fft(*args, **kwargs):
+    key=('cqt_kernel',)+tuple(constant_key(value) for value in args)
+    key=key+tuple((name, constant_key(kwargs[name])) for name in sorted(kwargs))
+    if key not in constants:
+        constants[key]=vqt_filter_fft(*args, **kwargs)
+    fft_basis, fft_length, lengths = constants[key]
+    return fft_basis.copy(), fft_length, lengths
+
+# route librosa's CQT kernel builder through the cache for this process
+def cache_cqt_kernels():
+    if vqt_filter_fft is not None:
+        setattr(librosa.core.constantq, '__vqt_filter_fft', cached_vqt_filter_fft)
+
+# build the constants (and compile librosa's numba functions) for featurizing
+# timesplit windows at sr ahead of time, e.g. when a daemon starts, so the
+# first real window is not charged for them; cqt=True also caches + builds
+# the CQT kernels (for callers of the CQT, e.g. the chroma_cqt node)
+def warm_up(sr=analysis_sr, timesplit=0.2, profile='full', cqt=False):
+    if sr is None:
+        sr=22050
+    y=np.random.default_rng(0).standard_normal(int(round(timesplit*sr))).astype(np.float32)*0.1
+    graph=FeatureGraph(y, sr)
+    graph_featurize(graph, False, profile=profile)
+    if cqt == True:
+        cache_cqt_kernels()
+        graph.get('cqt')
+
+# FEATURE BUDGET
+######################################################
+# a feature graph node that raised an error or ran past its time budget
+class FeatureFailed(Exception):
+    pass
+
+def raise_over_budget(signum, frame):
+    raise FeatureFailed('ran past its time budget')
+
+# run function() within a time budget of seconds. SIGALRM interrupts it between
+# Python calls (in the main thread only; elsewhere, and on Windows, a function
+# that ran past the budget fails once it returns). An enclosing timer, like the
+# per-file timeout of featurize_chunk, keeps running and fires first if it is
+# due sooner.
+def run_within(function, seconds):
+    start=time.perf_counter()
+    if not hasattr(signal, 'SIGALRM') or threading.current_thread() is not threading.main_thread():
+        output=function()
+        if time.perf_counter()-start > seconds:
+            raise FeatureFailed('ran past its time budget')
+        return output
+
+    outer=signal.getitimer(signal.ITIMER_REAL)[0]
+    if outer > 0 and outer <= seconds:
+        return function()
+    handler=signal.signal(signal.SIGALRM, raise_over_budget)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return function()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        if handler is not None:
+            signal.signal(signal.SIGALRM, handler)
+        if outer > 0:
+            signal.setitimer(signal.ITIMER_REAL, max(outer-(time.perf_counter()-start), 1e-6))
+
+class FeatureGraph:
+    # lazily computes the intermediates shared across features (STFT magnitude,
+    # power spectrum, mel spectrogram, onset envelope, CQT) once per signal, so
+    # every feature that needs them reuses the same matrix instead of
+    # recomputing it from y. y can also be a batch of equal-length signals
+    # (n_signals, n_samples); every node then keeps the batch axis first.
+    # With dtype (e.g. np.float32), y and every floating-point node are kept in
+    # that dtype (several librosa features come back as float64), and so are
+    # the feature vectors built from the graph.
+    # With costs (a FeatureCosts), the time + memory of every node is recorded.
+    # With budget (seconds), every node requested from outside the graph (with
+    # the nodes it needs) has to finish within budget; a node that runs past it
+    # or raises an error is recorded in failures ({node: reason}) and raises
+    # FeatureFailed, as does every node that needs it. The featurizers output
+    # the columns of failed feature groups as 0s (like pruned columns).
+    # A graph restored from stored frame tracks (FeatureCache.get_tracks) has
+    # no y, only the number of samples it had (length).
+    def __init__(self, y, sr, dtype=None, costs=None, budget=None):
+        if dtype is not None and y is not None:
+            y=np.asarray(y, dtype=dtype)
+        self.y=y
+        if y is not None:
+            self.length=np.shape(y)[-1]
+        else:
+            self.length=None
+        self.sr=sr
+        self.dtype=dtype
+        self.costs=costs
+        self.budget=budget
+        self.nodes=dict()
+        self.failures=dict()
+        self.depth=0
+
+    def get(self, name):
+        if name in self.failures:
+            raise FeatureFailed(self.failures[name])
+        if name not in self.nodes:
+            self.begin(name)
+            self.depth=self.depth+1
+            try:
+                if self.budget is not None and self.depth == 1:
+                    node=run_within(getattr(self, 'compute_'+name), self.budget)
+                else:
+                    node=getattr(self, 'compute_'+name)()
+            except FeaturizeTimeout:
+                raise
+            except Exception as e:
+                if self.budget is None:
+                    raise
+                if isinstance(e, FeatureFailed):
+                    self.failures[name]=str(e)
+                else:
+                    self.failures[name]='%s: %s'%(type(e).__name__, str(e))
+                raise FeatureFailed(self.failures[name])
+            finally:
+                self.depth=self.depth-1
+                self.end()
+            if self.dtype is not None and np.issubdtype(np.asarray(node).dtype, np.floating):
+                node=np.asarray(node, dtype=self.dtype)
+            self.nodes[name]=node
+        return self.nodes[name]
+
+    # record the cost of a step that is not a node (e.g. the stats) if costs is set
+    def begin(self, name):
+        if self.costs is not None:
+            self.costs.start(name)
+
+    def end(self):
+        if self.costs is not None:
+            self.costs.stop()
+
+    # STFT bin frequencies in the graph's dtype
+    def frequencies(self):
+        return constant('frequencies', self.sr, n_fft, self.dtype)
+
+    # SHARED INTERMEDIATES
+    ######################################################
+    def compute_magnitude(self):
+        return np.abs(librosa.stft(y=self.y, n_fft=n_fft, hop_length=hop_length,
+                                   window=constant('window', n_fft, self.dtype)))
+
+    def compute_power(self):
+        return self.get('magnitude')**2
+
+    def compute_mel(self):
+        # what melspectrogram(S=power) does, with the cached mel basis
+        return np.einsum('...ft,mf->...mt', self.get('power'), constant('mel_basis', self.sr, n_fft), optimize=True)
+
+    def compute_mel_db(self):
+        # clip top_db below the peak of each signal, not of the whole batch
+        mel_db=librosa.power_to_db(self.get('mel'), top_db=None)
+        return np.maximum(mel_db, np.amax(mel_db, axis=(-2,-1), keepdims=True)-top_db)
+
+    def compute_onset_envelope(self):
+        return librosa.onset.onset_strength(S=self.get('mel_db'), sr=self.sr, hop_length=hop_length)
+
+    def compute_cqt(self):
+        return np.abs(librosa.cqt(y=self.y, sr=self.sr, hop_length=hop_length,
+                                  n_bins=cqt_octaves*cqt_bins_per_octave,
+                                  bins_per_octave=cqt_bins_per_octave))
+
+    # FEATURES
+    ######################################################
+    def compute_mfcc(self):
+        return librosa.feature.mfcc(S=self.get('mel_db'), sr=self.sr)
+
+    def compute_poly_features(self):
+        return librosa.feature.poly_features(S=self.get('magnitude'), sr=self.sr, freq=self.frequencies())
+
+    def compute_chroma_stft(self):
+        return librosa.feature.chroma_stft(S=self.get('power'), sr=self.sr)
+
+    def compute_chroma_cqt(self):
+        return librosa.feature.chroma_cqt(C=self.get('cqt'), sr=self.sr,
+                                          n_octaves=cqt_octaves,
+                                          bins_per_octave=cqt_bins_per_octave)
+
+    def compute_chroma_cens(self):
+        return librosa.feature.chroma_cens(C=self.get('cqt'), sr=self.sr,
+                                           n_octaves=cqt_octaves,
+                                           bins_per_octave=cqt_bins_per_octave)
+
+    def compute_tempogram(self):
+        return librosa.feature.tempogram(onset_envelope=self.get('onset_envelope'), sr=self.sr, hop_length=hop_length,
+                                         win_length=384, window=constant('window', 384, self.dtype))
+
+    def compute_spectral_centroid(self):
+        return librosa.feature.spectral_centroid(S=self.get('magnitude'), sr=self.sr, freq=self.frequencies())[...,0,:]
+
+    def compute_spectral_bandwidth(self):
+        return librosa.feature.spectral_bandwidth(S=self.get('magnitude'), sr=self.sr, freq=self.frequencies())[...,0,:]
+
+    def compute_spectral_contrast(self):
+        return librosa.feature.spectral_contrast(S=self.get('magnitude'), sr=self.sr, freq=self.frequencies())[...,0,:]
+
+    def compute_spectral_flatness(self):
+        return librosa.feature.spectral_flatness(S=self.get('magnitude'))[...,0,:]
+
+    def compute_spectral_rolloff(self):
+        return librosa.feature.spectral_rolloff(S=self.get('magnitude'), sr=self.sr, freq=self.frequencies())[...,0,:]
+
+    def compute_onset_detect(self):
+        return librosa.onset.onset_detect(onset_envelope=self.get('onset_envelope'), sr=self.sr, hop_length=hop_length)
+
+    def compute_onset_stats(self):
+        return onset_stats(self)
+
+    def compute_onset_mask(self):
+        # onset_detect as a boolean mask over frames (works on a batch)
+        return librosa.onset.onset_detect(onset_envelope=self.get('onset_envelope'), sr=self.sr,
+                                          hop_length=hop_length, sparse=False)
+
+    def compute_tempo_tempogram(self):
+        # the 8 s tempogram beat.tempo(onset_envelope) estimates tempo from,
+        # with the cached window
+        win_length=int(librosa.time_to_frames(8.0, sr=self.sr, hop_length=hop_length))
+        return librosa.feature.tempogram(onset_envelope=self.get('onset_envelope'), sr=self.sr, hop_length=hop_length,
+                                         win_length=win_length, window=constant('window', win_length, self.dtype))
+
+    def compute_tempo(self):
+        # what beat.tempo(onset_envelope) does (mean of the 8 s tempogram)
+        return librosa.feature.tempo(tg=self.get('tempo_tempogram'), sr=self.sr, hop_length=hop_length)[...,0]
+
+    def compute_zero_crossings(self):
+        return librosa.feature.zero_crossing_rate(self.y, frame_length=n_fft, hop_length=hop_length)[...,0,:]
+
+    def compute_rmse(self):
+        # RMS stays in the time domain; computing it from the STFT changes the values
+        return librosa.feature.rms(y=self.y, frame_length=n_fft, hop_length=hop_length)[...,0,:]
+
+class FeatureCosts:
+    # collects the wall time (and, with memory=True, the peak bytes allocated
+    # through tracemalloc) of every FeatureGraph node and featurizing step
+    # across many calls. Times are exclusive: a node that needs another node
+    # (e.g. mfcc -> mel_db) is only charged for its own work, so the times of
+    # one call add up to its total. Peak bytes include the nodes computed
+    # inside a node, and count every allocation while tracemalloc is tracing.
+    def __init__(self, memory=False):
+        self.memory=memory
+        if memory == True and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # name -> list of seconds / list of peak bytes (one per computation)
+        self.times=dict()
+        self.peaks=dict()
+        # frames of the steps being measured: [name, start time, child seconds,
+        # traced bytes at start, highest traced peak seen]
+        self.stack=list()
+
+    def start(self, name):
+        current, peak = 0, 0
+        if self.memory == True:
+            current, peak = tracemalloc.get_traced_memory()
+            if len(self.stack) > 0:
+                self.stack[-1][4]=max(self.stack[-1][4], peak)
+            tracemalloc.reset_peak()
+        self.stack.append([name, time.perf_counter(), 0.0, current, current])
+
+    def stop(self):
+        name, start, child_seconds, start_bytes, peak = self.stack.pop()
+        seconds=time.perf_counter()-start
+        self.times.setdefault(name, list()).append(seconds-child_seconds)
+        if self.memory == True:
+            peak=max(peak, tracemalloc.get_traced_memory()[1])
+            self.peaks.setdefault(name, list()).append(peak-start_bytes)
+        if len(self.stack) > 0:
+            self.stack[-1][2]=self.stack[-1][2]+seconds
+            self.stack[-1][4]=max(self.stack[-1][4], peak)
+
+    # {name: {calls, total ms, share of the total time, mean + percentile ms,
+    # mean + max peak MB}} over everything recorded, most expensive first
+    def summary(self, percentiles=(50, 90, 99)):
+        total=sum([sum(times) for times in self.times.values()])
+        output=dict()
+        for name in sorted(self.times, key=lambda name: -sum(self.times[name])):
+            times=1000*np.array(self.times[name])
+            output[name]={'calls': len(times),
+                          'total_ms': float(np.sum(times)),
+                          'share': float(np.sum(times)/(1000*total)) if total > 0 else 0.0,
+                          'mean_ms': float(np.mean(times))}
+            for percentile in percentiles:
+                output[name]['p%s_ms'%(str(percentile))]=float(np.percentile(times, percentile))
+            if name in self.peaks:
+                output[name]['mean_peak_mb']=float(np.mean(self.peaks[name])/1024/1024)
+                output[name]['max_peak_mb']=float(np.amax(self.peaks[name])/1024/1024)
+        return output
+
+    # the summary as a markdown table
+    def table(self, percentiles=(50, 90, 99)):
+        summary=self.summary(percentiles)
+        columns=['calls', 'total_ms', 'share', 'mean_ms']+['p%s_ms'%(str(percentile)) for percentile in percentiles]
+        if self.memory == True:
+            columns=columns+['mean_peak_mb', 'max_peak_mb']
+        lines=['| step | '+' | '.join(columns)+' |', '| --- '*(len(columns)+1)+'|']
+        for name in summary:
+            values=['%.1f%%'%(100*summary[name][column]) if column == 'share' else
+                    str(summary[name][column]) if column == 'calls' else
+                    '%.3f'%(summary[name].get(column, 0)) for column in columns]
+            lines.append('| '+name+' | '+' | '.join(values)+' |')
+        return '\n'.join(lines)
+
 # featurize with librosa following documentation
 # https://librosa.github.io/librosa/feature.html 
-def librosa_featurize(filename, categorize):
+def librosa_featurize(filename, categorize, cache=None, sr=analysis_sr, res_type=resample_type,
+                      columns=None, profile='full', dtype=None, costs=None, budget=None, failures=None):
     # if categorize == True, output feature categories 
+    # if a FeatureCache is given, cached features are returned without decoding
+    # if columns (feature labels) is given, only the feature groups those
+    # columns need are computed; the other columns are 0
+    # profile picks the named feature profile (see profiles)
+    # dtype=np.float32 computes + outputs float32 features (see FeatureGraph)
+    # if costs (a FeatureCosts) is given, the cost of every step is recorded in it
+    # if budget (seconds) is given, a feature group that runs past it or fails
+    # outputs 0s, and is added to failures (a dict, if given) as {node: reason}
+    # (features with failures are not cached)
     print('librosa featurizing: %s'%(filename))
 
-    # initialize lists 
-    onset_labels=list()
+    groups=profile_groups(profile, columns)
+    if cache is not None:
+        key=cache.file_key(filename, sr, res_type, groups, profile, dtype)
+        features=cache.get(key)
+        if features is not None:
+            return output_features(features, feature_labels(profile), categorize)
+
+    if costs is not None:
+        costs.start('decode')
+    y, sr = load_audio(filename, sr, res_type)
+    if costs is not None:
+        costs.stop()
+    graph=FeatureGraph(y, sr, dtype, costs, budget)
+    features, labels = graph_featurize(graph, True, groups, profile)
+    if failures is not None:
+        failures.update(graph.failures)
+
+    if cache is not None and len(graph.failures) == 0:
+        cache.put(key, features)
+
+    return output_features(features, labels, categorize)
+
+# librosa_featurize for a signal that is already decoded (e.g. a window sliced
+# out of a recording with window_slices); cached on a hash of its samples
+def librosa_featurize_signal(y, sr, categorize, cache=None, columns=None, profile='full',
+                             dtype=None, costs=None, budget=None, failures=None):
+    groups=profile_groups(profile, columns)
+    if cache is not None:
+        key=cache.key(y, sr, groups, profile, dtype)
+        features=cache.get(key)
+        if features is not None:
+            return output_features(features, feature_labels(profile), categorize)
+
+    graph=FeatureGraph(y, sr, dtype, costs, budget)
+    features, labels = graph_featurize(graph, True, groups, profile)
+    if failures is not None:
+        failures.update(graph.failures)
+
+    if cache is not None and len(graph.failures) == 0:
+        cache.put(key, features)
+
+    return output_features(features, labels, categorize)
+
+# decode a file at the analysis sample rate (sr=None keeps the native rate)
+def load_audio(filename, sr=analysis_sr, res_type=resample_type):
+    return librosa.load(filename, sr=sr, res_type=res_type)
+
+# analysis sample rate from settings.json ("native" or a rate in Hz)
+def settings_sr(value):
+    if value == 'native':
+        return None
+    return int(value)
+
+# feature dtype from settings.json ("float32", or "float64" to keep the
+# dtypes librosa returns, which gives float64 feature vectors)
+def settings_dtype(value):
+    if value == 'float32':
+        return np.float32
+    return None
+
+# the feature categories, in the order they are concatenated
+categories=['onset', 'rhythm', 'spectral', 'power']
+
+# named feature profiles: the categories each profile's vector is made of.
+# 'realtime' keeps the cheap STFT-domain features (mfccs, spectral shape,
+# zero crossings, RMSE) and drops the onset/tempo/tempogram features
+profiles={'full': categories,
+          'realtime': ['spectral', 'power']}
+
+# stats tracks of the feature vector in order, as (category, label, graph
+# node, row of the node). Each track gives 5 stats; the node is the feature
+# group the track belongs to (groups are computed or skipped as a whole)
+track_layout=[('onset', 'onset_strength', 'onset_envelope', None)]
+# rhythm features (384) - take the first 13
+track_layout+=[('rhythm', 'rhythm_'+str(i), 'tempogram', i) for i in range(13)]
+# spectral features (first 13 mfccs)
+track_layout+=[('spectral', 'mfcc_'+str(i), 'mfcc', i) for i in range(13)]
+track_layout+=[('spectral', 'poly_'+str(i), 'poly_features', i) for i in range(2)]
+track_layout+=[('spectral', 'spectral_cenroid', 'spectral_centroid', None),
+               ('spectral', 'spectral_bandwidth', 'spectral_bandwidth', None),
+               ('spectral', 'spectral_contrast', 'spectral_contrast', None),
+               ('spectral', 'spectral_flatness', 'spectral_flatness', None),
+               ('spectral', 'spectral_rolloff', 'spectral_rolloff', None)]
+# power features
+track_layout+=[('power', 'zero_crossings', 'zero_crossings', None),
+               ('power', 'RMSE', 'rmse', None)]
+
+# get the labels of every feature of a profile (by category), in vector order
+def feature_labels(profile='full'):
+    labels={category: list() for category in categories}
+    labels['onset'].append('onset_length')
+    labels['onset']=stats_labels('onset_detect', labels['onset'])
+    labels['onset'].append('tempo')
+    for category, label, node, row in track_layout:
+        labels[category]=stats_labels(label, labels[category])
 
-    y, sr = librosa.load(filename)
+    return {category: labels[category] for category in profiles[profile]}
+
+# the labels of every feature in one flat list (columns of the feature matrix)
+def flat_labels(profile='full'):
+    labels=feature_labels(profile)
+    return [label for category in profiles[profile] for label in labels[category]]
+
+# the feature group of every feature label
+def label_groups():
+    groups={'onset_length': 'onset_detect', 'tempo': 'tempo'}
+    for label in stats_labels('onset_detect', list()):
+        groups[label]='onset_detect'
+    for category, label, node, row in track_layout:
+        for stat_label in stats_labels(label, list()):
+            groups[stat_label]=node
+
+    return groups
+
+# the feature groups needed to compute the given feature labels
+# (columns=None means every group)
+def column_groups(columns):
+    if columns is None:
+        return None
+    groups=label_groups()
+    return set(groups[label] for label in columns)
+
+# the feature groups to compute for a profile (limited to columns if given)
+def profile_groups(profile='full', columns=None):
+    if columns is None and profile != 'full':
+        columns=flat_labels(profile)
+    return column_groups(columns)
+
+# frame-level feature tracks (by category) that are summarized with stats();
+# tracks of groups left out of groups (if given) are None
+def frame_tracks(graph, groups=None):
+    tracks={category: list() for category in categories}
+    for category, label, node, row in track_layout:
+        if groups is not None and node not in groups:
+            tracks[category].append(None)
+            continue
+        try:
+            track=graph.get(node)
+        except FeatureFailed:
+            # failed within the graph's budget (see FeatureGraph)
+            tracks[category].append(None)
+            continue
+        if row is None:
+            tracks[category].append(track)
+        else:
+            tracks[category].append(track[...,row,:])
+
+    return tracks
+
+# onset count + stats of the onset frames of each signal in a FeatureGraph
+def onset_stats(graph):
+    if np.ndim(graph.y) == 1:
+        onset=graph.get('onset_detect')
+        if len(onset) == 0:
+            # no onsets (e.g. silence): 0s, as in the batch + pooled paths
+            return np.zeros(6)
+        return np.concatenate([[len(onset)], stats(onset)])
+
+    # batch: stats of the frame indices flagged in each row of the onset mask
+    # (rows without any onset get 0s)
+    onset_mask=graph.get('onset_mask')
+    frames=np.where(onset_mask, np.arange(onset_mask.shape[-1]), np.nan)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        output=np.stack([np.sum(onset_mask, axis=-1),
+                         np.nanmean(frames, axis=-1),
+                         np.nanstd(frames, axis=-1),
+                         np.nanmax(frames, axis=-1),
+                         np.nanmin(frames, axis=-1),
+                         np.nanmedian(frames, axis=-1)], axis=-1)
+
+    return np.nan_to_num(output)
+
+# assemble the feature vector from a FeatureGraph
+# (a matrix with one row per signal if the graph holds a batch).
+# if groups is given, only those feature groups are computed and the columns
+# of the other groups are 0s, so every column keeps its position.
+# only the categories of the feature profile are output
+def graph_featurize(graph, categorize, groups=None, profile='full'):
 
     # FEATURE EXTRACTION
     ######################################################
-    # extract major features using librosa
-    mfcc=librosa.feature.mfcc(y)
-    poly_features=librosa.feature.poly_features(y)
-    chroma_cens=librosa.feature.chroma_cens(y)
-    chroma_cqt=librosa.feature.chroma_cqt(y)
-    chroma_stft=librosa.feature.chroma_stft(y)
-    tempogram=librosa.feature.tempogram(y)
-
-    spectral_centroid=librosa.feature.spectral_centroid(y)[0]
-    spectral_bandwidth=librosa.feature.spectral_bandwidth(y)[0]
-    spectral_contrast=librosa.feature.spectral_contrast(y)[0]
-    spectral_flatness=librosa.feature.spectral_flatness(y)[0]
-    spectral_rolloff=librosa.feature.spectral_rolloff(y)[0]
-    onset=librosa.onset.onset_detect(y)
-    onset=np.append(len(onset),stats(onset))
-    # append labels 
-    onset_labels.append('onset_length')
-    onset_labels=stats_labels('onset_detect', onset_labels)
-
-    tempo=librosa.beat.tempo(y)[0]
-    onset_features=np.append(onset,tempo)
-
-    # append labels
-    onset_labels.append('tempo')
-
-    onset_strength=librosa.onset.onset_strength(y)
-    onset_labels=stats_labels('onset_strength', onset_labels)
-    zero_crossings=librosa.feature.zero_crossing_rate(y)[0]
-    rmse=librosa.feature.rmse(y)[0]
+    # extract major features using librosa (each shared
+    # intermediate is only computed once by the graph)
+    if groups is None:
+        groups=profile_groups(profile)
+    tracks=frame_tracks(graph, groups)
+    shape=np.shape(graph.y)[:-1]
+    onset=np.zeros(shape+(6,))
+    tempo=np.zeros(shape)
+    try:
+        if groups is None or 'onset_detect' in groups:
+            onset=graph.get('onset_stats')
+    except FeatureFailed:
+        pass
+    try:
+        if groups is None or 'tempo' in groups:
+            tempo=graph.get('tempo')
+    except FeatureFailed:
+        pass
 
     # FEATURE CLEANING 
     ######################################################
+    # 5 stats per frame track (per signal, along the frame axis)
+    graph.begin('stats')
+    features=dict()
+    for category in profiles[profile]:
+        features[category]=np.concatenate([np.zeros(shape+(5,)) if track is None else stats(track, axis=-1)
+                                           for track in tracks[category]], axis=-1)
+
+    # onset detection features go in front of the onset strength stats
+    if 'onset' in features:
+        features['onset']=np.concatenate([onset, tempo[...,np.newaxis], features['onset']], axis=-1)
 
-    # onset detection features
-    onset_features=np.append(onset_features,stats(onset_strength))
-
-
-    # rhythm features (384) - take the first 13
-    rhythm_features=np.concatenate(np.array([stats(tempogram[0]),
-                                      stats(tempogram[1]),
-                                      stats(tempogram[2]),
-                                      stats(tempogram[3]),
-                                      stats(tempogram[4]),
-                                      stats(tempogram[5]),
-                                      stats(tempogram[6]),
-                                      stats(tempogram[7]),
-                                      stats(tempogram[8]),
-                                      stats(tempogram[9]),
-                                      stats(tempogram[10]),
-                                      stats(tempogram[11]),
-                                      stats(tempogram[12])]))
-    rhythm_labels=list()
-    for i in range(13):
-        rhythm_labels=stats_labels('rhythm_'+str(i), rhythm_labels)
-
-    # spectral features (first 13 mfccs)
-    spectral_features=np.concatenate(np.array([stats(mfcc[0]),
-                                        stats(mfcc[1]),
-                                        stats(mfcc[2]),
-                                        stats(mfcc[3]),
-                                        stats(mfcc[4]),
-                                        stats(mfcc[5]),
-                                        stats(mfcc[6]),
-                                        stats(mfcc[7]),
-                                        stats(mfcc[8]),
-                                        stats(mfcc[9]),
-                                        stats(mfcc[10]),
-                                        stats(mfcc[11]),
-                                        stats(mfcc[12]),
-                                        stats(poly_features[0]),
-                                        stats(poly_features[1]),
-                                        stats(spectral_centroid),
-                                        stats(spectral_bandwidth),
-                                        stats(spectral_contrast),
-                                        stats(spectral_flatness),
-                                        stats(spectral_rolloff)])) 
-
-    spectral_labels=list()
-    for i in range(13):
-        spectral_labels=stats_labels('mfcc_'+str(i), spectral_labels)
-    for i in range(2):
-        spectral_labels=stats_labels('poly_'+str(i), spectral_labels)
-    spectral_labels=stats_labels('spectral_cenroid', spectral_labels)
-    spectral_labels=stats_labels('spectral_bandwidth', spectral_labels)
-    spectral_labels=stats_labels('spectral_contrast', spectral_labels)
-    spectral_labels=stats_labels('spectral_flatness', spectral_labels)
-    spectral_labels=stats_labels('spectral_rolloff', spectral_labels)
-
-    # power features
-    power_features=np.concatenate(np.array([stats(zero_crossings),
-                                         stats(rmse)]))
-    power_labels=list()
-    power_labels=stats_labels('zero_crossings',power_labels)
-    power_labels=stats_labels('RMSE', power_labels) 
+    if graph.dtype is not None:
+        for category in features:
+            features[category]=features[category].astype(graph.dtype)
+    graph.end()
 
+    return output_features(features, feature_labels(profile), categorize)
+
+# output features + labels by category, or as one vector/list
+def output_features(features, labels, categorize):
     # you can also concatenate the features
     if categorize == True:
         # can output feature categories if true 
-        features={'onset':onset_features,
-                  'rhythm':rhythm_features,
-                  'spectral':spectral_features,
-                  'power':power_features}
-
-        labels={'onset':onset_labels,
-                'rhythm':rhythm_labels,
-                'spectral':spectral_labels,
-                'power': power_labels}
+        return features, labels
     else:
         # can output numpy array of everything if we don't need categorizations 
-        features = np.concatenate(np.array([onset_features,
-                                       rhythm_features,
-                                       spectral_features,
-                                       power_features]))
-        labels=onset_labels+rhythm_labels+spectral_labels+power_labels
+        features=np.concatenate([features[category] for category in categories if category in features], axis=-1)
+        labels=[label for category in categories if category in labels for label in labels[category]]
+
+    return features, labels
+
+# FEATURE CACHE
+######################################################
+class FeatureCache:
+    # content-addressed on-disk cache of feature vectors (by category), shared
+    # by every process pointed at the same directory. Entries are keyed on a
+    # hash of the audio, the sample rate and feature_version; writes are atomic
+    # (temp file + rename) and the least recently used entries are evicted
+    # once the cache grows past max_mb.
+    def __init__(self, directory=None, max_mb=512):
+        if directory is None:
+            directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'feature_cache')
+        self.directory=directory
+        self.max_bytes=int(max_mb*1024*1024)
+        # running size estimate; the directory is only rescanned to evict
+        self.size=None
+
+    # key for an in-memory signal (hash of its samples; groups, profile and
+    # dtype as in file_key)
+    def key(self, y, sr, groups=None, profile='full', dtype=None):
+        digest=hashlib.sha1(np.ascontiguousarray(y).tobytes())
+        return self.make_key(digest, self.kind(y.dtype.str, groups, profile, dtype), sr)
+
+    # key for an audio file (hash of its encoded samples; nothing is decoded)
+    # (pruned vectors computed for a subset of feature groups and the vectors
+    # of other feature profiles or dtypes get their own key)
+    def file_key(self, filename, sr, res_type=resample_type, groups=None, profile='full', dtype=None):
+        digest=self.file_digest(filename)
+        return self.make_key(digest, self.kind('file_'+res_type, groups, profile, dtype), sr)
+
+    def kind(self, kind, groups=None, profile='full', dtype=None):
+        if groups is not None:
+            kind+='_'+'+'.join(sorted(groups))
+        if profile != 'full':
+            kind+='_'+profile
+        if dtype is not None:
+            kind+='_'+np.dtype(dtype).name
+        return kind
+
+    # key for the frame tracks of an audio file (see put_tracks)
+    def tracks_key(self, filename, sr, res_type=resample_type, dtype=None):
+        kind='tracks_'+res_type
+        if dtype is not None:
+            kind+='_'+np.dtype(dtype).name
+        return self.make_key(self.file_digest(filename), kind, sr)
+
+    def file_digest(self, filename):
+        digest=hashlib.sha1()
+        with open(filename, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024*1024), b''):
+                digest.update(chunk)
+        return digest
+
+    def make_key(self, digest, kind, sr):
+        digest.update(('%s_%s_%s'%(kind, str(sr), feature_version)).encode('utf-8'))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key[0:2], key+'.npz')
+
+    def get(self, key):
+        path=self.path(key)
+        try:
+            # (the categories of the entry's feature profile)
+            with np.load(path) as data:
+                features={category: data[category] for category in data.files}
+            # mark as recently used
+            os.utime(path, None)
+        except (OSError, KeyError, ValueError):
+            # missing, evicted by another process, or unreadable: a miss
+            return None
+        return features
+
+    def put(self, key, features):
+        path=self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        f=tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False)
+        try:
+            with f:
+                np.savez(f, **features)
+            os.replace(f.name, path)
+        except OSError:
+            if os.path.exists(f.name):
+                os.remove(f.name)
+            raise
+
+        self.grow(os.path.getsize(path))
+
+    # add bytes written to the running size + evict past the size cap
+    def grow(self, size):
+        if self.size is None:
+            self.size=self.disk_size()
+        else:
+            self.size=self.size+size
+        if self.size > self.max_bytes:
+            self.evict()
+
+    # store the frame-level tracks of a FeatureGraph built on a whole recording
+    # (the frame feature nodes of track_layout it computed, and its onset
+    # frames as a 0/1 row) as one (n_rows, n_frames) .npy, next to a .json
+    # with the node, row count and dtype of the rows + the recording length.
+    # The .npy is named after a hash of that layout and the .json (written
+    # last) names it, so a reader always pairs the rows with their own layout,
+    # whatever other writers of the same key store
+    def put_tracks(self, key, graph):
+        nodes=list()
+        rows=list()
+        for node in ['onset_detect']+list(dict.fromkeys([layout[2] for layout in track_layout])):
+            if node not in graph.nodes:
+                continue
+            if node == 'onset_detect':
+                mask=np.zeros((1, 1+graph.length//hop_length), dtype=np.uint8)
+                mask[0,graph.nodes[node]]=1
+                rows.append(mask)
+                nodes.append((node, 1, mask.dtype.str))
+            else:
+                # the rows of the node that track_layout pools
+                count=max([1 if row is None else row+1 for category, label, name, row in track_layout if name == node])
+                matrix=np.reshape(graph.nodes[node], (-1, graph.nodes[node].shape[-1]))[0:count]
+                rows.append(matrix)
+                nodes.append((node, count if np.ndim(graph.nodes[node]) > 1 else None, matrix.dtype.str))
+        matrix=np.concatenate(rows, axis=0).astype(np.result_type(*[row.dtype for row in rows]))
+
+        path=self.path(key)[0:-4]+'.tracks'
+        meta={'nodes': nodes, 'length': int(graph.length), 'sr': graph.sr, 'dtype': matrix.dtype.str}
+        meta['matrix']=os.path.basename(path)+'.'+hashlib.sha1(json.dumps(meta).encode('utf-8')).hexdigest()[0:16]+'.npy'
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        size=0
+        for target in [os.path.join(os.path.dirname(path), meta['matrix']), path+'.json']:
+            f=tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix='.tmp', delete=False)
+            try:
+                with f:
+                    if target.endswith('.npy'):
+                        np.save(f, matrix)
+                    else:
+                        f.write(json.dumps(meta).encode('utf-8'))
+                os.replace(f.name, target)
+            except OSError:
+                if os.path.exists(f.name):
+                    os.remove(f.name)
+                raise
+            size=size+os.path.getsize(target)
+        self.grow(size)
+
+    # a FeatureGraph restored from stored frame tracks (read as a memory map;
+    # the tempo tempogram is recomputed from the onset envelope), or None if
+    # there are none, they do not match their layout, or they lack a node the
+    # feature groups need (groups=None: every group)
+    def get_tracks(self, key, sr, dtype=None, groups=None, costs=None):
+        path=self.path(key)[0:-4]+'.tracks'
+        try:
+            with open(path+'.json') as f:
+                meta=json.load(f)
+            matrix_path=os.path.join(os.path.dirname(path), meta['matrix'])
+            matrix=np.load(matrix_path, mmap_mode='r')
+            os.utime(matrix_path, None)
+            os.utime(path+'.json', None)
+        except (OSError, ValueError, KeyError):
+            return None
+
+        # (a row per node row, a column per frame of the recording)
+        n_rows=sum([1 if count is None else count for node, count, node_dtype in meta['nodes']])
+        if matrix.shape != (n_rows, 1+meta['length']//hop_length) or matrix.dtype.str != meta['dtype']:
+            return None
+
+        needed=set([layout[2] for layout in track_layout]+['onset_detect', 'tempo'])
+        if groups is not None:
+            needed=set(groups)
+        if 'tempo' in needed:
+            needed.remove('tempo')
+            needed.add('onset_envelope')
+        if not needed.issubset([node for node, count, node_dtype in meta['nodes']]):
+            return None
+
+        # rows keep their memory map unless their node had another dtype
+        graph=FeatureGraph(None, meta['sr'], dtype, costs)
+        graph.length=meta['length']
+        start=0
+        for node, count, node_dtype in meta['nodes']:
+            if node == 'onset_detect':
+                graph.nodes[node]=np.flatnonzero(matrix[start])
+            elif count is None:
+                graph.nodes[node]=np.asarray(matrix[start], dtype=node_dtype)
+            else:
+                graph.nodes[node]=np.asarray(matrix[start:start+count], dtype=node_dtype)
+            start=start+(1 if count is None else count)
+        return graph
+
+    # (mtime, size, path) of every cache file
+    def entries(self):
+        entries=list()
+        for root, dirs, files in os.walk(self.directory):
+            for file in files:
+                path=os.path.join(root, file)
+                try:
+                    info=os.stat(path)
+                except OSError:
+                    continue
+                entries.append((info.st_mtime, info.st_size, path))
+        return entries
+
+    def disk_size(self):
+        return sum([entry[1] for entry in self.entries()])
+
+    # remove least recently used entries down to 90% of the size cap
+    # (plus temp files left behind by crashed writers)
+    def evict(self):
+        now=time.time()
+        cached=list()
+        stale=list()
+        for mtime, filesize, path in self.entries():
+            if not path.endswith('.tmp'):
+                cached.append((mtime, filesize, path))
+            elif now-mtime > 3600:
+                # younger temp files may still be written by another process
+                stale.append((mtime, filesize, path))
+
+        size=sum([entry[1] for entry in cached])
+        for mtime, filesize, path in sorted(cached):
+            if size <= 0.9*self.max_bytes:
+                break
+            stale.append((mtime, filesize, path))
+            size=size-filesize
+
+        for mtime, filesize, path in stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self.size=size
+
+# BATCH FEATURIZATION
+######################################################
+class FeaturizeTimeout(Exception):
+    pass
+
+def raise_timeout(signum, frame):
+    raise FeaturizeTimeout('featurizing took too long')
+
+# featurize a chunk of files inside a worker process; every file gets
+# (features, None) or (None, error message) so one bad file only fails itself
+def featurize_chunk(filenames, timeout, cache, sr, res_type, columns=None, profile='full', dtype=None):
+    # per-file time limit through SIGALRM (not available on Windows)
+    use_alarm=timeout is not None and hasattr(signal, 'SIGALRM')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, raise_timeout)
+
+    results=list()
+    for filename in filenames:
+        try:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, timeout)
+            features, labels = librosa_featurize(filename, False, cache, sr, res_type, columns, profile, dtype)
+            results.append((features.astype(np.float32), None))
+        except Exception as e:
+            results.append((None, '%s: %s'%(type(e).__name__, str(e))))
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+
+    return results
+
+# seconds a worker gets past the per-file timeouts of its chunk before the
+# parent gives up on it (SIGALRM cannot interrupt a hang inside C code, e.g.
+# a decoder, numba or BLAS)
+pool_grace=30
+
+# the result of a chunk's future, waiting at most timeout seconds per file
+# (+ pool_grace); timeout=None waits as long as it takes
+def chunk_result(future, files, timeout):
+    if timeout is None:
+        return future.result()
+    return future.result(timeout=timeout*files+pool_grace)
+
+# the initializer of start_pool's workers: report the worker's pid
+def report_pid(pids):
+    pids.put(os.getpid())
+
+# a process pool whose workers report their pids when they start (in
+# executor.worker_pids), so terminate_pool can stop them
+def start_pool(workers):
+    context=multiprocessing.get_context()
+    pids=context.SimpleQueue()
+    executor=ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=report_pid, initargs=(pids,))
+    executor.worker_pids=pids
+    return executor
+
+# stop the workers of a start_pool pool with a hung task (shutdown would wait
+# for it); its unfinished futures fail with BrokenProcessPool. A worker that
+# has not reported its pid yet is not running a task: killing the others
+# breaks the pool, and the executor then stops it itself
+def terminate_pool(executor):
+    pids=set()
+    while not executor.worker_pids.empty():
+        pids.add(executor.worker_pids.get())
+    for pid in pids:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            # exited already
+            pass
+    executor.shutdown(wait=True, cancel_futures=True)
+
+# featurize many files in a process pool. Returns a float32 matrix with one
+# row per file in input order (NaN rows for files that failed), the labels,
+# and a dict of {index: error message} for the failures.
+# workers=None uses every core; timeout is the per-file limit in seconds,
+# enforced in the worker and, for hangs the worker cannot interrupt, by the
+# parent (the pool is then terminated and the unfinished files retried).
+def librosa_featurize_many(filenames, workers=None, chunksize=4, timeout=60, cache=None,
+                           sr=analysis_sr, res_type=resample_type, columns=None, profile='full', dtype=None):
+    labels=flat_labels(profile)
+    features=np.full((len(filenames), len(labels)), np.nan, dtype=np.float32)
+    errors=dict()
+
+    # store the results of a chunk of indices
+    def store(chunk, results):
+        for i, (vector, error) in zip(chunk, results):
+            if error is None:
+                features[i]=vector
+            else:
+                errors[i]=error
+
+    chunks=[list(range(i, min(i+chunksize, len(filenames)))) for i in range(0, len(filenames), chunksize)]
+    retry=list()
+    executor=start_pool(workers)
+    futures=list()
+    for chunk in chunks:
+        futures.append((executor.submit(featurize_chunk, [filenames[i] for i in chunk], timeout, cache, sr, res_type, columns, profile, dtype), chunk))
+    # chunks start in submission order, so once the chunks before a chunk are
+    # done it is running, and its deadline can be counted from then
+    for future, chunk in futures:
+        try:
+            store(chunk, chunk_result(future, len(chunk), timeout))
+        except (BrokenProcessPool, CancelledError):
+            retry.extend(chunk)
+        except FutureTimeout:
+            terminate_pool(executor)
+            retry.extend(chunk)
+    executor.shutdown()
+
+    # a worker process died (e.g. a decoder crash) or hung: retry the
+    # unfinished files one at a time in a single worker, where the first file
+    # that breaks the pool or runs past the deadline is the one that did it
+    retry=sorted(retry)
+    while len(retry) > 0:
+        executor=start_pool(1)
+        futures=[executor.submit(featurize_chunk, [filenames[i]], timeout, cache, sr, res_type, columns, profile, dtype) for i in retry]
+        finished=True
+        for j in range(len(futures)):
+            try:
+                store([retry[j]], chunk_result(futures[j], 1, timeout))
+            except (BrokenProcessPool, FutureTimeout) as e:
+                if isinstance(e, FutureTimeout):
+                    terminate_pool(executor)
+                    errors[retry[j]]='FeaturizeTimeout: worker hung past the deadline'
+                else:
+                    errors[retry[j]]='BrokenProcessPool: worker process died'
+                retry=retry[j+1:]
+                finished=False
+                break
+        executor.shutdown(cancel_futures=True)
+        if finished:
+            retry=list()
+
+    return features, labels, errors
+
+# STREAMING
+######################################################
+class StreamingFeaturizer:
+    # featurizes live audio: blocks (at sample rate sr) are written into a
+    # preallocated ring buffer, and every completed timesplit window (advancing
+    # hop seconds, default timesplit) is copied into a reused window buffer and
+    # featurized with the same layout as librosa_featurize. If the ring buffer
+    # overflows because featurizing falls behind, the oldest samples are dropped.
+    # write (the producer, e.g. an audio callback thread) and featurize_ready
+    # (the consumer) can run in different threads: the ring buffer and the
+    # window position are only touched under a lock.
+    def __init__(self, sr=analysis_sr, timesplit=0.2, hop=None, capacity=4, profile='full', dtype=None, costs=None):
+        if hop is None:
+            hop=timesplit
+        self.sr=sr
+        self.profile=profile
+        self.dtype=dtype
+        self.costs=costs
+        self.window_length=int(round(timesplit*sr))
+        self.hop_length=int(round(hop*sr))
+        # capacity is in windows
+        self.buffer=np.zeros(capacity*self.window_length, dtype=np.float32)
+        self.window=np.zeros(self.window_length, dtype=np.float32)
+        # total samples written / start sample of the next window / samples dropped
+        self.written=0
+        self.position=0
+        self.dropped=0
+        self.lock=threading.RLock()
+
+    # add a block of samples; (frames, channels) blocks are mixed down to mono
+    def write(self, block):
+        block=np.asarray(block, dtype=np.float32)
+        if block.ndim > 1:
+            block=np.mean(block, axis=-1)
+
+        with self.lock:
+            size=len(self.buffer)
+            length=len(block)
+            if length > size:
+                block=block[length-size:]
+            start=(self.written+length-len(block)) % size
+            first=min(len(block), size-start)
+            self.buffer[start:start+first]=block[0:first]
+            self.buffer[0:len(block)-first]=block[first:]
+            self.written=self.written+length
+
+            if self.written-self.position > size:
+                self.dropped=self.dropped+self.written-size-self.position
+                self.position=self.written-size
+
+    # copy the next window out of the ring buffer into the window buffer
+    def read_window(self):
+        with self.lock:
+            size=len(self.buffer)
+            start=self.position % size
+            first=min(self.window_length, size-start)
+            self.window[0:first]=self.buffer[start:start+first]
+            self.window[first:]=self.buffer[0:self.window_length-first]
+        return self.window
+
+    # featurize every completed window written so far (the consumer side);
+    # returns a list of (window onset in seconds, feature vector)
+    def featurize_ready(self):
+        outputs=list()
+        while True:
+            # take the window + move past it in one step, so a write that
+            # drops samples in between cannot tear it or lose its adjustment
+            with self.lock:
+                if self.written-self.position < self.window_length:
+                    break
+                onset=self.position/self.sr
+                window=self.read_window()
+                self.position=self.position+self.hop_length
+            features, labels = graph_featurize(FeatureGraph(window, self.sr, self.dtype, self.costs), False, profile=self.profile)
+            outputs.append((onset, features))
+        return outputs
+
+    # write a block + featurize every window it completes;
+    # returns a list of (window onset in seconds, feature vector)
+    def consume(self, block):
+        self.write(block)
+        return self.featurize_ready()
+
+# featurize a batch of equal-length windows, e.g. window_view() of a decoded
+# signal: (n_windows, n_samples) in, (n_windows, n_features) + labels out.
+# Frame transforms and stats run along the batch axis in one pass.
+# columns prunes feature groups as in librosa_featurize; with a FeatureCache,
+# cached windows are read from it (keyed as in librosa_featurize_signal) and
+# only the others are featurized + cached. With a budget (seconds), each
+# feature group of the whole batch has to finish within it, as in
+# librosa_featurize: the group outputs 0s for every window of the batch and is
+# added to failures (a batch with failures is not cached)
+def librosa_featurize_batch(windows, sr, profile='full', dtype=None, costs=None, columns=None, cache=None,
+                            budget=None, failures=None):
+    print('librosa featurizing %s windows'%(str(len(windows))))
+
+    groups=profile_groups(profile, columns)
+    labels=feature_labels(profile)
+    if len(windows) == 0:
+        return np.zeros((0, len(flat_labels(profile))), dtype=dtype), flat_labels(profile)
+    cached=[None]*len(windows)
+    if cache is not None:
+        keys=[cache.key(window, sr, groups, profile, dtype) for window in windows]
+        cached=[cache.get(key) for key in keys]
+    missing=[i for i in range(len(windows)) if cached[i] is None]
+
+    if len(missing) > 0:
+        graph=FeatureGraph(window_batch([windows[i] for i in missing]), sr, dtype, costs, budget)
+        computed, labels = graph_featurize(graph, True, groups, profile)
+        if failures is not None:
+            failures.update(graph.failures)
+        for j in range(len(missing)):
+            cached[missing[j]]={category: computed[category][j] for category in computed}
+            if cache is not None and len(graph.failures) == 0:
+                cache.put(keys[missing[j]], cached[missing[j]])
+
+    features={category: np.stack([vector[category] for vector in cached]) for category in profiles[profile]}
+
+    return output_features(features, labels, False)
+
+# strided (n_windows, n_samples) view of the whole timesplit windows of y,
+# advancing hop seconds per window (default: no overlap); no samples are copied
+def window_view(y, sr, timesplit, hop=None):
+    if hop is None:
+        hop=timesplit
+    window_length=int(round(timesplit*sr))
+    hop_samples=int(round(hop*sr))
+    return np.lib.stride_tricks.sliding_window_view(y, window_length)[::hop_samples]
+
+# equal-length windows as one (n_windows, n_samples) batch: a strided view when
+# they are evenly spaced views into one signal (as window_slices cuts whole
+# windows out of a recording), so no samples are copied; a stacked copy else
+def window_batch(windows):
+    first=windows[0]
+    itemsize=first.itemsize
+    if len(windows) > 1 and first.ndim == 1 and first.base is not None and first.strides == (itemsize,):
+        addresses=np.array([window.__array_interface__['data'][0] for window in windows])
+        steps=np.diff(addresses)
+        if (steps[0] >= 0 and np.all(steps == steps[0])
+            and all(window.base is first.base and window.dtype == first.dtype and window.shape == first.shape
+                    and window.strides == (itemsize,) for window in windows)):
+            return np.lib.stride_tricks.as_strided(first, shape=(len(windows), len(first)),
+                                                   strides=(int(steps[0]), itemsize), writeable=False)
+    return np.stack(windows)
+
+# WHOLE-RECORDING MODE
+######################################################
+# the frame tracks above are computed once over a whole recording and then
+# pooled into timesplit windows, instead of writing + decoding a wav per window
+
+# onset/offset times (seconds) of the whole timesplit windows in a recording,
+# advancing hop seconds per window (default timesplit: no overlap).
+# tail picks what happens to the audio after the last whole window:
+# 'drop' leaves it out, 'keep' adds a shorter window ending at the end of the
+# recording, and 'pad' adds a timesplit window running past the end (its
+# samples past the end are 0s in window_slices)
+def window_bounds(duration, timesplit, hop=None, tail='drop'):
+    if hop is None:
+        hop=timesplit
+    segnum=max(int(np.floor((duration-timesplit)/hop+1e-9))+1, 0)
+    if tail != 'drop' and duration > 0 and (segnum == 0 or (segnum-1)*hop+timesplit < duration-1e-9):
+        segnum=segnum+1
+    onsets=np.arange(segnum)*hop
+    offsets=onsets+timesplit
+    if tail == 'keep':
+        offsets=np.minimum(offsets, duration)
+    return onsets, offsets
+
+# the samples of each window (onset/offset times in seconds) of y: views into
+# y, except windows that run past its end, which are copied + padded with 0s
+def window_slices(y, sr, onsets, offsets):
+    slices=list()
+    for onset, offset in zip(onsets, offsets):
+        start=int(round(onset*sr))
+        stop=int(round(offset*sr))
+        if stop > len(y):
+            slices.append(np.pad(y[start:], (0, stop-max(start, len(y)))))
+        else:
+            slices.append(y[start:stop])
+    return slices
+
+# frames whose centers fall inside each window (at least one frame per window);
+# first is the frame of the recording that frame 0 is (for a graph built on
+# part of a recording, with onsets/offsets in recording time)
+def window_frames(onsets, offsets, sr, n_frames, first=0):
+    starts=np.ceil(np.asarray(onsets)*sr/hop_length).astype(int)-first
+    stops=np.ceil(np.asarray(offsets)*sr/hop_length).astype(int)-first
+    starts=np.clip(starts, 0, n_frames-1)
+    stops=np.clip(np.maximum(stops, starts+1), 1, n_frames)
+    return starts, stops
+
+# vectorized stats() over frame windows: tracks (n_tracks, n_frames) in,
+# (n_windows, n_tracks*5) out, with the same 5-stat layout per track.
+# frames flagged False in mask are left out; windows without any frame get 0s.
+def pool_stats(tracks, starts, stops, mask=None):
+    if mask is None:
+        return rolling_stats(tracks, starts, stops)
+
+    index=starts[:,np.newaxis]+np.arange(np.amax(stops-starts))[np.newaxis,:]
+    valid=index<stops[:,np.newaxis]
+    index=np.minimum(index, tracks.shape[-1]-1)
+    valid=valid & mask[index]
+
+    frames=np.where(valid, tracks[:,index], np.nan)
+    with warnings.catch_warnings():
+        # all-nan windows (no valid frames) are zeroed below
+        warnings.simplefilter('ignore', RuntimeWarning)
+        output=np.stack([np.nanmean(frames, axis=-1),
+                         np.nanstd(frames, axis=-1),
+                         np.nanmax(frames, axis=-1),
+                         np.nanmin(frames, axis=-1),
+                         np.nanmedian(frames, axis=-1)], axis=-1)
+
+    output=np.nan_to_num(output)
+    return output.transpose(1,0,2).reshape(len(starts), -1)
+
+# stats() over frame windows of any length and hop (every window has at least
+# one frame), reusing the work shared by overlapping neighbours: mean + std
+# come from running sums over the frames, and the windows of a length that
+# cover the frames more than once get max / min / median from running filters
+# computed once per frame (instead of once per window they fall in). Sparser
+# windows are gathered from a strided view. Same layout as pool_stats
+def rolling_stats(tracks, starts, stops):
+    tracks=np.asarray(tracks)
+    n_frames=tracks.shape[-1]
+    lengths=stops-starts
+
+    # running sums, centered on the mean of each track so the variance does not
+    # lose precision to a large offset (e.g. spectral centroids in Hz)
+    offset=np.mean(tracks, axis=-1, keepdims=True, dtype=np.float64)
+    centered=tracks-offset
+    zeros=np.zeros((tracks.shape[0],1))
+    sums=np.concatenate([zeros, np.cumsum(centered, axis=-1)], axis=-1)
+    squares=np.concatenate([zeros, np.cumsum(centered**2, axis=-1)], axis=-1)
+    mean=(sums[:,stops]-sums[:,starts])/lengths
+    variance=(squares[:,stops]-squares[:,starts])/lengths-mean**2
+    mean=mean+offset
+    std=np.sqrt(np.maximum(variance, 0))
+
+    maxv=np.zeros(mean.shape, dtype=tracks.dtype)
+    minv=np.zeros(mean.shape, dtype=tracks.dtype)
+    median=np.zeros(mean.shape, dtype=tracks.dtype)
+    for length in np.unique(lengths):
+        windows=np.flatnonzero(lengths == length)
+        window_starts=starts[windows]
+        if len(windows)*length > n_frames:
+            # filter outputs at frame i cover frames i..i+length-1
+            origin=-(length//2)
+            maxv[:,windows]=ndimage.maximum_filter1d(tracks, length, axis=-1, origin=origin)[:,window_starts]
+            minv[:,windows]=ndimage.minimum_filter1d(tracks, length, axis=-1, origin=origin)[:,window_starts]
+            for i in range(len(tracks)):
+                upper=ndimage.rank_filter(tracks[i], length//2, size=length, origin=origin)[window_starts]
+                if length % 2 == 0:
+                    lower=ndimage.rank_filter(tracks[i], length//2-1, size=length, origin=origin)[window_starts]
+                    median[i,windows]=(lower+upper)/2
+                else:
+                    median[i,windows]=upper
+        else:
+            frames=np.lib.stride_tricks.sliding_window_view(tracks, length, axis=-1)[:,window_starts]
+            maxv[:,windows]=np.amax(frames, axis=-1)
+            minv[:,windows]=np.amin(frames, axis=-1)
+            median[:,windows]=np.median(frames, axis=-1)
+
+    # constant windows (e.g. silence) get an exact 0 std, not the rounding
+    # error of the running sums
+    std[maxv == minv]=0
+    output=np.stack([mean,std,maxv,minv,median], axis=-1)
+    return output.transpose(1,0,2).reshape(len(starts), -1)
+
+# tempo of each window from the mean of the 8 s tempogram over the window's
+# frames (what beat.tempo does with aggregate=np.mean on one signal)
+def window_tempo(graph, starts, stops):
+    tempogram=graph.get('tempo_tempogram')
+    graph.begin('window_tempo')
+    cumulative=np.concatenate([np.zeros((tempogram.shape[0],1)), np.cumsum(tempogram, axis=1)], axis=1)
+    window_tempogram=(cumulative[:,stops]-cumulative[:,starts])/(stops-starts)
+
+    tempo=librosa.feature.tempo(tg=window_tempogram, sr=graph.sr, hop_length=hop_length, aggregate=None)
+    graph.end()
+
+    return tempo
+
+# categories whose features are pooled over the context around each window
+# (onset detection, tempo, onset strength and tempogram rows)
+context_categories=['onset', 'rhythm']
+
+# feature matrix (n_windows, n_features) for the given windows of a FeatureGraph
+# built on a whole recording; columns follow feature_labels() (columns of
+# feature groups left out of groups, if given, are 0s; only the categories of
+# the feature profile are output). The features of context_categories are
+# pooled over context seconds of the recording on each side of the window
+# (0: the window itself), as the onset envelope and tempogram are computed
+# on the whole recording anyway. A graph built on part of a recording that
+# starts at frame first of it takes onsets/offsets in recording time
+def pooled_featurize(graph, onsets, offsets, groups=None, profile='full', context=0, first=0):
+    if groups is None:
+        groups=profile_groups(profile)
+    tracks=frame_tracks(graph, groups)
+    # centered frames, as every frame feature of the graph uses
+    n_frames=1+graph.length//hop_length
+    if len(onsets) == 0:
+        # no windows (e.g. a recording shorter than one window)
+        return np.zeros((0, len(flat_labels(profile))), dtype=graph.dtype)
+    window_starts, window_stops = window_frames(onsets, offsets, graph.sr, n_frames, first)
+    starts, stops = window_frames(np.asarray(onsets)-context, np.asarray(offsets)+context, graph.sr, n_frames, first)
+
+    # onset detection features: onset count + stats of the onset frames
+    # relative to the window (or context) start, as if it was featurized alone
+    if groups is None or 'onset_detect' in groups:
+        onset_mask=np.zeros(n_frames, dtype=bool)
+        onset_mask[graph.get('onset_detect')]=True
+        graph.begin('pooling')
+        onset_cumulative=np.concatenate([[0], np.cumsum(onset_mask)])
+        onset_length=onset_cumulative[stops]-onset_cumulative[starts]
+        onset_stats=pool_stats(np.arange(n_frames)[np.newaxis,:], starts, stops, mask=onset_mask)
+        # shift mean/max/min/median (not std) to window-relative frames
+        onset_stats[:,[0,2,3,4]]-=np.where(onset_length>0, starts, 0)[:,np.newaxis]
+        graph.end()
+    else:
+        onset_length=np.zeros(len(starts))
+        onset_stats=np.zeros((len(starts), 5))
+    if groups is None or 'tempo' in groups:
+        tempo=window_tempo(graph, starts, stops)
+    else:
+        tempo=np.zeros(len(starts))
+
+    graph.begin('pooling')
+    features=list()
+    if 'onset' in profiles[profile]:
+        features=[onset_length[:,np.newaxis], onset_stats, tempo[:,np.newaxis]]
+    for category in profiles[profile]:
+        output=np.zeros((len(starts), len(tracks[category]), 5), dtype=graph.dtype)
+        present=[i for i in range(len(tracks[category])) if tracks[category][i] is not None]
+        if len(present) > 0 and category in context_categories:
+            pooled=pool_stats(np.vstack([tracks[category][i] for i in present]), starts, stops)
+            output[:,present]=pooled.reshape(len(starts), len(present), 5)
+        elif len(present) > 0:
+            pooled=pool_stats(np.vstack([tracks[category][i] for i in present]), window_starts, window_stops)
+            output[:,present]=pooled.reshape(len(starts), len(present), 5)
+        features.append(output.reshape(len(starts), -1))
+
+    features=np.concatenate(features, axis=1)
+    if graph.dtype is not None:
+        features=features.astype(graph.dtype)
+    graph.end()
+
+    return features
+
+# the FeatureGraph of a whole recording: restored from the frame tracks stored
+# in cache (a FeatureCache) if it has them, so only pooling is left to do (no
+# decode, STFT or frame features), else decoded + built. Returns graph, key
+# (pass both to store_tracks once the graph is pooled)
+def recording_graph(filename, sr, res_type, groups=None, dtype=None, costs=None, cache=None):
+    key=None
+    if cache is not None:
+        key=cache.tracks_key(filename, sr, res_type, dtype)
+        graph=cache.get_tracks(key, sr, dtype, groups, costs)
+        if graph is not None:
+            return graph, key
+
+    if costs is not None:
+        costs.start('decode')
+    y, sr = load_audio(filename, sr, res_type)
+    if costs is not None:
+        costs.stop()
+    return FeatureGraph(y, sr, dtype, costs), key
+
+# store the frame tracks of a graph from recording_graph (if it was not restored)
+def store_tracks(graph, key, cache=None):
+    if cache is not None and graph.y is not None:
+        cache.put_tracks(key, graph)
+
+# featurize every timesplit window of a recording (advancing hop seconds, default
+# timesplit) from one decode + one pass of frame features; overlapping windows
+# share their stats work (see rolling_stats). With a FeatureCache, the frame
+# tracks are stored, so featurizing the recording again with another
+# timesplit, hop or context is only a pooling pass.
+# returns (n_windows, n_features), labels, onsets, offsets
+def librosa_featurize_windows(filename, timesplit, sr=analysis_sr, res_type=resample_type,
+                              columns=None, profile='full', context=0, dtype=None, costs=None, hop=None, cache=None, tail='drop'):
+    print('librosa featurizing %s windows: %s'%(str(timesplit), filename))
+
+    groups=profile_groups(profile, columns)
+    graph, key = recording_graph(filename, sr, res_type, groups, dtype, costs, cache)
+    onsets, offsets = window_bounds(graph.length/graph.sr, timesplit, hop, tail)
+    features=pooled_featurize(graph, onsets, offsets, groups, profile, context)
+    store_tracks(graph, key, cache)
+    labels=flat_labels(profile)
+
+    return features, labels, onsets, offsets
+
+# librosa_featurize_windows for a recording that is already decoded (samples y
+# at sample rate sr; no frame tracks are cached)
+def librosa_featurize_signal_windows(y, sr, timesplit, columns=None, profile='full', context=0,
+                                     dtype=None, costs=None, hop=None, tail='drop'):
+    print('librosa featurizing %s windows of %s samples'%(str(timesplit), str(np.shape(y)[-1])))
+
+    groups=profile_groups(profile, columns)
+    graph=FeatureGraph(y, sr, dtype, costs)
+    onsets, offsets = window_bounds(graph.length/graph.sr, timesplit, hop, tail)
+    features=pooled_featurize(graph, onsets, offsets, groups, profile, context)
+    labels=flat_labels(profile)
+
+    return features, labels, onsets, offsets
+
+# featurize segments (onset/offset times in seconds) of a recording, e.g. the
+# labeled segments cut from it, from one decode + one pass of frame features
+# (or the frame tracks stored in cache, see librosa_featurize_windows);
+# returns (n_segments, n_features), labels
+def librosa_featurize_segments(filename, onsets, offsets, sr=analysis_sr, res_type=resample_type,
+                               columns=None, profile='full', context=0, dtype=None, costs=None, cache=None):
+    print('librosa featurizing %s segments: %s'%(str(len(onsets)), filename))
+
+    groups=profile_groups(profile, columns)
+    graph, key = recording_graph(filename, sr, res_type, groups, dtype, costs, cache)
+    features=pooled_featurize(graph, onsets, offsets, groups, profile, context)
+    store_tracks(graph, key, cache)
+    labels=flat_labels(profile)
 
     return features, labels
 
+# FEATURE PYRAMID
+######################################################
+# window lengths (seconds) of a feature pyramid
+pyramid_timesplits=[0.1, 0.2, 0.5, 1.0]
+
+# featurize a recording at several window lengths (timesplits, seconds) from
+# one decode + one pass of frame features (or the frame tracks stored in cache,
+# see librosa_featurize_windows): every resolution pools the same frame
+# tracks. Returns {timesplit: (features, onsets, offsets)}, labels
+# (recordings shorter than a timesplit get no windows at that resolution)
+def librosa_featurize_pyramid(filename, timesplits=pyramid_timesplits, sr=analysis_sr, res_type=resample_type,
+                              columns=None, profile='full', context=0, dtype=None, costs=None, cache=None):
+    print('librosa featurizing %s windows: %s'%(', '.join([str(timesplit) for timesplit in timesplits]), filename))
+
+    groups=profile_groups(profile, columns)
+    graph, key = recording_graph(filename, sr, res_type, groups, dtype, costs, cache)
+    labels=flat_labels(profile)
+
+    pyramid=dict()
+    for timesplit in timesplits:
+        onsets, offsets = window_bounds(graph.length/graph.sr, timesplit)
+        if len(onsets) > 0:
+            features=pooled_featurize(graph, onsets, offsets, groups, profile, context)
+        else:
+            features=np.zeros((0, len(labels)), dtype=graph.dtype)
+        pyramid[timesplit]=(features, onsets, offsets)
+    store_tracks(graph, key, cache)
+
+    return pyramid, labels
+
+# store a pyramid side by side in one .npz (features_<timesplit>,
+# onsets_<timesplit>, offsets_<timesplit> per resolution + the labels)
+def save_pyramid(filename, pyramid, labels):
+    arrays={'labels': np.array(labels)}
+    for timesplit in pyramid:
+        features, onsets, offsets = pyramid[timesplit]
+        arrays['features_'+str(timesplit)]=features
+        arrays['onsets_'+str(timesplit)]=onsets
+        arrays['offsets_'+str(timesplit)]=offsets
+    np.savez(filename, **arrays)
+
+# read a pyramid written by save_pyramid; returns pyramid, labels
+def load_pyramid(filename):
+    arrays=np.load(filename)
+    pyramid=dict()
+    for key in arrays.files:
+        if key.startswith('features_'):
+            timesplit=key[len('features_'):]
+            pyramid[float(timesplit)]=(arrays[key], arrays['onsets_'+timesplit], arrays['offsets_'+timesplit])
+    return pyramid, list(arrays['labels'])
+
+# FEATURE STORE
+######################################################
+class FeatureStore:
+    # featurized windows for training, in a directory:
+    # - features.f32: float32 matrix (one row per window, columns in the order
+    #   of labels), appended to in place and loaded as a read-only memory map
+    #   (no parsing or copy)
+    # - index.csv: source file, onset + offset (seconds, nan if unknown),
+    #   label and stamp (the version of the source it was featurized from,
+    #   e.g. its mtime + size; '' for rows appended without one) of every row
+    # - store.json: the feature labels, the number of rows and the index size
+    #   of the last complete append (anything past them, e.g. from an
+    #   interrupted append, is overwritten by the next append)
+    def __init__(self, directory, labels=None):
+        self.directory=directory
+        self.matrix_path=os.path.join(directory, 'features.f32')
+        self.index_path=os.path.join(directory, 'index.csv')
+        self.meta_path=os.path.join(directory, 'store.json')
+        if os.path.exists(self.meta_path):
+            meta=json.load(open(self.meta_path))
+            if labels is not None and list(labels) != meta['labels']:
+                raise ValueError('feature store %s holds other feature labels'%(directory))
+            self.labels=meta['labels']
+            self.rows=meta['rows']
+            self.index_bytes=meta['index_bytes']
+        elif labels is None:
+            raise ValueError('no feature store in %s (give labels to create one)'%(directory))
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.labels=list(labels)
+            self.rows=0
+            self.index_bytes=0
+            self.write_meta()
+
+    def __len__(self):
+        return self.rows
+
+    def write_meta(self):
+        f=tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False)
+        with f:
+            json.dump({'labels': self.labels, 'rows': self.rows, 'index_bytes': self.index_bytes}, f)
+        os.replace(f.name, self.meta_path)
+
+    # append windows: features (n_windows, n_features) + a source, onset,
+    # offset and label (+ optionally a stamp) per window
+    def append(self, features, sources, onsets, offsets, labels, stamps=None):
+        features=np.ascontiguousarray(features, dtype=np.float32).reshape(-1, len(self.labels))
+        if stamps is None:
+            stamps=['']*len(sources)
+        if not len(features) == len(sources) == len(onsets) == len(offsets) == len(labels) == len(stamps):
+            raise ValueError('every window needs a source, onset, offset and label')
+
+        lines=io.StringIO()
+        writer=csv.writer(lines)
+        for row in zip(sources, onsets, offsets, labels, stamps):
+            writer.writerow([row[0], repr(float(row[1])), repr(float(row[2])), row[3], row[4]])
+
+        with open(self.matrix_path, 'ab') as f:
+            f.truncate(self.rows*len(self.labels)*4)
+            f.write(features.tobytes())
+        with open(self.index_path, 'ab') as f:
+            f.truncate(self.index_bytes)
+            f.write(lines.getvalue().encode('utf-8'))
+            index_bytes=f.tell()
+
+        self.rows=self.rows+len(features)
+        self.index_bytes=index_bytes
+        self.write_meta()
+
+    # (n_rows, n_features) read-only float32 memory map of the features
+    def features(self):
+        if self.rows == 0:
+            return np.zeros((0, len(self.labels)), dtype=np.float32)
+        return np.memmap(self.matrix_path, dtype=np.float32, mode='r', shape=(self.rows, len(self.labels)))
+
+    # the index as arrays: {'source', 'onset', 'offset', 'label', 'stamp'}
+    # (index_bytes is a byte offset, so the index is read as bytes)
+    def index(self):
+        rows=list()
+        if self.rows > 0:
+            with open(self.index_path, 'rb') as f:
+                rows=list(csv.reader(f.read(self.index_bytes).decode('utf-8').splitlines()))
+        return {'source': np.array([row[0] for row in rows], dtype=str),
+                'onset': np.array([float(row[1]) for row in rows]),
+                'offset': np.array([float(row[2]) for row in rows]),
+                'label': np.array([row[3] for row in rows], dtype=str),
+                'stamp': np.array([row[4] if len(row) > 4 else '' for row in rows], dtype=str)}
+
 # features, labels =librosa_featurize('test.wav', True)
 # print(len(features['power']))
 # print(len(labels['power']))
\ No newline at end of file
@@ -0,0 +1,131 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##              MEMORY_REPORT.PY              ##    
+================================================ 
+
+Reports the peak memory, time and accuracy of featurizing in float64 (the
+dtypes librosa returns) against float32 (the feature_dtype setting).
+
+Peak memory is measured with tracemalloc (numpy allocations) for a long
+recording (load_dir/fast.wav repeated to the given number of minutes)
+featurized into timesplit windows from one pass of frame features, and for
+the same windows featurized as one batch. Accuracy is the cross-validated
+accuracy of the bundled RandomForest pipeline on the labeled windows in
+./data in each dtype, and how often a model trained on float64 features
+predicts the same class from float32 features.
+
+Usage: python3 memory_report.py [minutes] [timesplit]
+'''
+import os, sys, time, tracemalloc
+import numpy as np
+import librosa_features as lf
+import report_common as rc
+
+# peak memory (MB) + time (s) of a featurizer, and its output
+def measure(function, *args):
+    tracemalloc.start()
+    start=time.perf_counter()
+    output=function(*args)
+    elapsed=time.perf_counter()-start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return output, peak/1024/1024, elapsed
+
+def pooled(y, sr, timesplit, dtype):
+    onsets, offsets = lf.window_bounds(len(y)/sr, timesplit)
+    return lf.pooled_featurize(lf.FeatureGraph(y, sr, dtype), onsets, offsets)
+
+def batch(y, sr, timesplit, dtype):
+    return lf.graph_featurize(lf.FeatureGraph(lf.window_view(y, sr, timesplit), sr, dtype), False)[0]
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        minutes=float(sys.argv[1])
+    else:
+        minutes=5
+    if len(sys.argv) > 2:
+        timesplit=float(sys.argv[2])
+    else:
+        timesplit=0.2
+
+    hostdir=os.path.dirname(os.path.abspath(__file__))
+    y, sr = lf.load_audio(hostdir+'/load_dir/fast.wav')
+    y=np.tile(y, int(np.ceil(minutes*60*sr/len(y))))[0:int(minutes*60*sr)]
+
+    classes, wavfiles, targets = rc.labeled_files(hostdir)
+    signals=[lf.load_audio(wavfile)[0] for wavfile in wavfiles]
+    folds=rc.cv_folds(targets)
+
+    # warm up the constant matrices + numba
+    lf.warm_up(sr, timesplit)
+
+    dtypes=[('float64', None), ('float32', np.float32)]
+    print('%.1f minute recording, %s s windows @ %s Hz | %s labeled windows (%s), %s-fold CV\n'%(minutes, str(timesplit), str(sr),
+                                                                                           len(signals), ', '.join(classes), str(folds)))
+    print('| feature_dtype | recording peak MB | recording s | batch peak MB | batch s | feature matrix MB | max relative difference | CV accuracy | agreement with float64 model |')
+    print('| --- | --- | --- | --- | --- | --- | --- | --- | --- |')
+    reference=None
+    for name, dtype in dtypes:
+        features, recording_mb, recording_s = measure(pooled, y, sr, timesplit, dtype)
+        batch_features, batch_mb, batch_s = measure(batch, y, sr, timesplit, dtype)
+        data=np.array([lf.graph_featurize(lf.FeatureGraph(signal, sr, dtype), False)[0] for signal in signals])
+        cv_accuracy=rc.cv_accuracy(data, targets)
+        if reference is None:
+            reference=(features, rc.make_model().fit(data, targets), data)
+        difference=np.amax(np.abs(features-reference[0])/(np.abs(reference[0])+1e-6))
+        agreement=np.mean(reference[1].predict(data) == reference[1].predict(reference[2]))
+        print('| %s | %.1f | %.2f | %.1f | %.2f | %.2f | %.1e | %.3f | %.3f |'%(name, recording_mb, recording_s, batch_mb, batch_s,
+                                                                       features.nbytes/1024/1024, difference, cv_accuracy, agreement))
@@ -0,0 +1,248 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##             MODEL_REGISTRY.PY              ##    
+================================================ 
+
+Keeps the trained models of a folder (the <class>_<class>_<type>.pickle +
+.json pairs train_audioTPOT.py writes to ./models) loaded once per process.
+
+A registry can be shared by threads. Models are listed from a small manifest
+(manifest.json in the folder) holding each model's classes, accuracy and
+feature setup from its .json, with the mtime, size and hash of its files;
+only models whose files changed are read again. A model whose .json has no
+'feature_columns' (e.g. one trained before they were recorded) is unpickled
+once to derive them, and the result is kept in the manifest. Pickles are
+loaded on first use and reloaded only when the file's mtime changed and its
+hash did too, so a retrained model is picked up by a running process without
+restarting it.
+'''
+import hashlib, json, os, pickle, tempfile, threading
+import numpy as np
+import librosa_features as lf
+
+manifest_version=2
+
+# classes of a model from its file name (<class>_<class>_..._<type>.pickle)
+def model_classes(modelname):
+    classnum=modelname.count('_')
+    return modelname.split('_')[0:classnum]
+
+# the feature labels a fitted model actually reads. Walks the pipeline from
+# the final estimator back: trees/linear models only use the columns with a
+# nonzero importance/coefficient, selectors map columns back to their input,
+# scalers keep columns as they are, and any other step (PCA, stacking, ...)
+# mixes columns so it needs all of them
+def model_columns(model, labels):
+    steps=[model]
+    if hasattr(model, 'steps'):
+        steps=[step for name, step in model.steps]
+
+    used=np.ones(len(labels), dtype=bool)
+    estimator=steps[-1]
+    if hasattr(estimator, 'feature_importances_'):
+        used=np.asarray(estimator.feature_importances_) > 0
+    elif hasattr(estimator, 'coef_'):
+        used=np.any(np.atleast_2d(estimator.coef_) != 0, axis=0)
+
+    for step in steps[-2::-1]:
+        if hasattr(step, 'get_support'):
+            support=np.zeros(len(step.get_support()), dtype=bool)
+            support[step.get_support()]=used
+            used=support
+        elif type(step).__name__ not in ['StandardScaler', 'MinMaxScaler', 'MaxAbsScaler',
+                                          'RobustScaler', 'Binarizer']:
+            used=np.ones(len(labels), dtype=bool)
+
+    if len(used) != len(labels):
+        return list(labels)
+
+    return [labels[i] for i in range(len(labels)) if used[i]]
+
+class ModelRegistry:
+
+    def __init__(self, directory):
+        self.directory=os.path.abspath(directory)
+        self.manifest_path=os.path.join(self.directory, 'manifest.json')
+        # name: (stamp, digest, model) of the loaded models
+        self.loaded=dict()
+        self.manifest=self.read_manifest()
+        self.lock=threading.RLock()
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def read_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest=json.load(f)
+        except (OSError, ValueError):
+            return dict()
+        if manifest.get('version') != manifest_version:
+            return dict()
+        return manifest['models']
+
+    def write_manifest(self):
+        f=tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False)
+        try:
+            with f:
+                json.dump({'version': manifest_version, 'models': self.manifest}, f)
+            os.replace(f.name, self.manifest_path)
+        except OSError:
+            # a read-only model folder still works, it is just listed again next time
+            if os.path.exists(f.name):
+                os.remove(f.name)
+
+    # mtime + size of a model's .pickle and .json
+    def stamp(self, name):
+        stamp=list()
+        for path in [self.path(name), self.path(name[0:-7]+'.json')]:
+            stat=os.stat(path)
+            stamp=stamp+[stat.st_mtime_ns, stat.st_size]
+        return stamp
+
+    def digest(self, name):
+        digest=hashlib.sha1()
+        with open(self.path(name), 'rb') as f:
+            for chunk in iter(lambda: f.read(1024*1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    # manifest entry of a model, read from its .json (the model is only
+    # unpickled when the .json has no feature_columns)
+    def entry(self, name, stamp):
+        with open(self.path(name[0:-7]+'.json')) as f:
+            data=json.load(f)
+        classes=model_classes(name)
+        digest=self.digest(name)
+        feature_profile=data.get('feature_profile', 'full')
+        feature_columns=data.get('feature_columns')
+        if feature_columns is None:
+            model=self.load_model(name, stamp, digest)
+            feature_columns=model_columns(model, lf.flat_labels(feature_profile))
+        return {'stamp': stamp,
+                'digest': digest,
+                'classes': classes,
+                'classnum': len(classes),
+                'accuracy': data.get('accuracy'),
+                'feature_profile': feature_profile,
+                'feature_columns': feature_columns,
+                'analysis_sr': data.get('analysis_sr', 22050),
+                'rhythm_context': data.get('rhythm_context', 0),
+                'feature_dtype': data.get('feature_dtype', 'float64')}
+
+    # bring the manifest up to date with the folder (models with a .pickle and a
+    # .json); returns the sorted model names
+    def refresh(self):
+        with self.lock:
+            return self.refresh_names()
+
+    def refresh_names(self):
+        names=sorted(name for name in os.listdir(self.directory)
+                     if name[-7:] == '.pickle' and os.path.exists(self.path(name[0:-7]+'.json')))
+        changed=False
+        for name in list(self.manifest):
+            if name not in names:
+                del self.manifest[name]
+                changed=True
+        for name in names:
+            stamp=self.stamp(name)
+            if name not in self.manifest or self.manifest[name]['stamp'] != stamp:
+                self.manifest[name]=self.entry(name, stamp)
+                changed=True
+        if changed == True:
+            self.write_manifest()
+        return names
+
+    def names(self):
+        return self.refresh()
+
+    # manifest entry of a model (classes, accuracy, feature setup, ...)
+    def info(self, name):
+        with self.lock:
+            if name not in self.manifest:
+                self.refresh_names()
+            return self.manifest[name]
+
+    # the unpickled model; loaded on first use, and again only once its file
+    # has changed (new mtime or size and a new hash)
+    def get(self, name):
+        with self.lock:
+            return self.get_model(name)
+
+    def get_model(self, name):
+        stamp=self.stamp(name)
+        if name in self.loaded:
+            loaded_stamp, digest, model = self.loaded[name]
+            if loaded_stamp == stamp:
+                return model
+        if self.manifest.get(name, {}).get('stamp') != stamp:
+            self.manifest[name]=self.entry(name, stamp)
+            self.write_manifest()
+        return self.load_model(name, stamp, self.manifest[name]['digest'])
+
+    def load_model(self, name, stamp, digest):
+        if name in self.loaded and self.loaded[name][1] == digest:
+            # touched or rewritten with the same model
+            model=self.loaded[name][2]
+        else:
+            print('loading model %s'%(name))
+            with open(self.path(name), 'rb') as f:
+                model=pickle.load(f)
+        self.loaded[name]=(stamp, digest, model)
+        return model
+
+    def load_all(self):
+        return [self.get(name) for name in self.names()]
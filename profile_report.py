@@ -0,0 +1,111 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##             PROFILE_REPORT.PY              ##    
+================================================ 
+
+Reports the per-window featurize cost and model accuracy of every feature
+profile in librosa_features.py (see the feature_profile setting), on the
+labeled windows in ./data (one folder per class).
+
+Cost is the mean time to featurize one window on its own (as
+load_audioTPOT.py does per window) and per window when all windows are
+featurized as one batch. Accuracy is the cross-validated accuracy of the
+bundled RandomForest pipeline trained on each profile's features.
+
+Usage: python3 profile_report.py
+'''
+import os, time
+import numpy as np
+import librosa_features as lf
+import report_common as rc
+
+# features + mean featurize time (ms) per window, one window at a time
+def featurize_profile(signals, sr, profile, repeats=3):
+    start=time.perf_counter()
+    for i in range(repeats):
+        features=[lf.graph_featurize(lf.FeatureGraph(y, sr), False, profile=profile)[0] for y in signals]
+    return np.array(features), 1000*(time.perf_counter()-start)/(repeats*len(signals))
+
+# mean featurize time (ms) per window, all windows as one batch
+def batch_profile(signals, sr, profile, repeats=3):
+    length=min([len(y) for y in signals])
+    windows=np.stack([y[0:length] for y in signals])
+    start=time.perf_counter()
+    for i in range(repeats):
+        lf.graph_featurize(lf.FeatureGraph(windows, sr), False, profile=profile)
+    return 1000*(time.perf_counter()-start)/(repeats*len(signals))
+
+if __name__ == '__main__':
+    hostdir=os.path.dirname(os.path.abspath(__file__))
+    classes, wavfiles, targets = rc.labeled_files(hostdir)
+    signals=list()
+    for wavfile in wavfiles:
+        y, sr = lf.load_audio(wavfile)
+        signals.append(y)
+    folds=rc.cv_folds(targets)
+
+    # warm up librosa / numba so the first profile is not charged for it
+    for profile in lf.profiles:
+        featurize_profile(signals[0:1], sr, profile, repeats=1)
+
+    print('%s windows (%s) at %s Hz | %s-fold CV\n'%(len(signals), ', '.join(classes), str(sr), str(folds)))
+    print('| feature_profile | features | window featurize ms | batched window featurize ms | CV accuracy |')
+    print('| --- | --- | --- | --- | --- |')
+    for profile in lf.profiles:
+        features, window_ms = featurize_profile(signals, sr, profile)
+        batch_ms=batch_profile(signals, sr, profile)
+        cv_accuracy=rc.cv_accuracy(features, targets)
+        print('| %s | %s | %.2f | %.2f | %.3f |'%(profile, str(features.shape[1]), window_ms, batch_ms, cv_accuracy))
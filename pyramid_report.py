@@ -0,0 +1,144 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##             PYRAMID_REPORT.PY              ##    
+================================================ 
+
+Reports what a multi-resolution feature pyramid (librosa_featurize_pyramid)
+costs and how models do at each window length, on the annotated recordings
+in ./processed (each .wav with a .csv of *_annotated windows, as written by
+label_files.py).
+
+Cost compares featurizing every resolution from one decode + one pass of
+frame features against a separate librosa_featurize_windows pass per window
+length. Each window is labeled with the annotated label it overlaps most,
+and accuracy is the cross-validated accuracy of the bundled RandomForest
+pipeline on the windows of each resolution.
+
+Usage: python3 pyramid_report.py [timesplit] [timesplit] ...
+'''
+import csv, glob, os, sys, time
+import numpy as np
+import librosa_features as lf
+import report_common as rc
+
+# annotated (onset, offset, label) rows of a label_files.py .csv
+def read_annotations(csvfile):
+    annotations=list()
+    for row in csv.DictReader(open(csvfile)):
+        if row['event_label'].endswith('_annotated'):
+            annotations.append((float(row['onset']), float(row['offset']), row['event_label'][0:-len('_annotated')]))
+    return annotations
+
+# label of each window: the annotated label it overlaps most (None if none)
+def window_labels(onsets, offsets, annotations):
+    labels=list()
+    for onset, offset in zip(onsets, offsets):
+        overlaps=dict()
+        for start, stop, label in annotations:
+            overlap=min(offset, stop)-max(onset, start)
+            if overlap > 0:
+                overlaps[label]=overlaps.get(label, 0)+overlap
+        if len(overlaps) > 0:
+            labels.append(max(overlaps, key=overlaps.get))
+        else:
+            labels.append(None)
+    return labels
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        timesplits=[float(timesplit) for timesplit in sys.argv[1:]]
+    else:
+        timesplits=lf.pyramid_timesplits
+
+    hostdir=os.path.dirname(os.path.abspath(__file__))
+    recordings=[wavfile for wavfile in sorted(glob.glob(hostdir+'/processed/*.wav')) if os.path.exists(wavfile[0:-4]+'.csv')]
+
+    # warm up librosa / numba so the first pass is not charged for it
+    lf.librosa_featurize_pyramid(recordings[0], timesplits)
+
+    pyramid_seconds=0
+    separate_seconds=0
+    features={timesplit: list() for timesplit in timesplits}
+    targets={timesplit: list() for timesplit in timesplits}
+    for wavfile in recordings:
+        start=time.perf_counter()
+        pyramid, labels = lf.librosa_featurize_pyramid(wavfile, timesplits)
+        pyramid_seconds=pyramid_seconds+time.perf_counter()-start
+        start=time.perf_counter()
+        for timesplit in timesplits:
+            lf.librosa_featurize_windows(wavfile, timesplit)
+        separate_seconds=separate_seconds+time.perf_counter()-start
+
+        annotations=read_annotations(wavfile[0:-4]+'.csv')
+        for timesplit in timesplits:
+            window_features, onsets, offsets = pyramid[timesplit]
+            for vector, label in zip(window_features, window_labels(onsets, offsets, annotations)):
+                if label is not None:
+                    features[timesplit].append(vector)
+                    targets[timesplit].append(label)
+
+    print('\n%s recordings | one pyramid pass: %.1f ms | one pass per timesplit: %.1f ms (%.2fx)\n'%(len(recordings), 1000*pyramid_seconds,
+                                                                                                 1000*separate_seconds, separate_seconds/pyramid_seconds))
+    print('| timesplit | windows | classes | CV accuracy |')
+    print('| --- | --- | --- | --- |')
+    for timesplit in timesplits:
+        classes, counts = np.unique(targets[timesplit], return_counts=True)
+        if len(classes) > 1 and min(counts) >= 2:
+            cv_accuracy='%.3f'%(rc.cv_accuracy(np.array(features[timesplit]), targets[timesplit]))
+        else:
+            # too few windows of a class at this resolution to cross-validate
+            cv_accuracy='n/a'
+        print('| %s | %s | %s | %s |'%(str(timesplit), str(len(targets[timesplit])), ', '.join(classes), cv_accuracy))
@@ -0,0 +1,94 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##             REPORT_COMMON.PY               ##    
+================================================ 
+
+What the report scripts (profile_report.py, resample_report.py,
+memory_report.py and pyramid_report.py) share: the labeled windows in ./data
+(one folder per class), the model they train and how they cross-validate it.
+'''
+import glob, os
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+# hyperparameters of the bundled models/silence_speech_tpotclassifier.py
+# pipeline (a RandomForest)
+def make_model():
+    return RandomForestClassifier(bootstrap=False, criterion="entropy", max_features=0.45,
+                                  min_samples_leaf=4, min_samples_split=9, n_estimators=100,
+                                  random_state=0)
+
+# the classes (folder names), .wav files and class index of every file in
+# hostdir/data
+def labeled_files(hostdir):
+    classes=sorted([c for c in os.listdir(hostdir+'/data') if os.path.isdir(hostdir+'/data/'+c)])
+    wavfiles=list()
+    targets=list()
+    for i in range(len(classes)):
+        classfiles=sorted(glob.glob(hostdir+'/data/'+classes[i]+'/*.wav'))
+        wavfiles=wavfiles+classfiles
+        targets=targets+[i]*len(classfiles)
+    return classes, wavfiles, np.array(targets)
+
+# folds to cross-validate targets with (up to 5, no more than the smallest class)
+def cv_folds(targets):
+    return int(min(5, min(np.unique(targets, return_counts=True)[1])))
+
+# mean cross-validated accuracy of make_model() on features
+def cv_accuracy(features, targets):
+    return np.mean(cross_val_score(make_model(), features, targets,
+                                   cv=StratifiedKFold(cv_folds(targets), shuffle=True, random_state=0)))
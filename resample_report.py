@@ -0,0 +1,133 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##             RESAMPLE_REPORT.PY             ##    
+================================================ 
+
+Reports how the analysis sample rate / resampler options in settings.json
+change decode + featurize time (and the decode time of load_dir/fast.wav), the feature vectors, and model accuracy
+on the labeled windows in ./data (one folder per class).
+
+Every option is compared against librosa's default (22050 Hz, soxr_hq):
+feature drift is the relative difference per feature, and accuracy is
+that of a classifier trained on default features (the bundled RandomForest
+pipeline) when it is fed each option's features, next to the cross-validated
+accuracy of the same pipeline trained on that option's own features.
+
+Usage: python3 resample_report.py
+'''
+import os, time
+import numpy as np
+import librosa_features as lf
+import report_common as rc
+
+# (analysis_sr, resample_type) options to compare; the first is the reference
+options=[(22050, 'soxr_hq'),
+         (22050, 'soxr_mq'),
+         (22050, 'soxr_lq'),
+         (22050, 'soxr_qq'),
+         (22050, 'polyphase'),
+         ('native', 'soxr_hq')]
+
+def featurize_option(wavfiles, analysis_sr, resample_type):
+    sr=lf.settings_sr(analysis_sr)
+    features=list()
+    decode_time=0
+    feature_time=0
+    for wavfile in wavfiles:
+        start=time.perf_counter()
+        y, rate = lf.load_audio(wavfile, sr, resample_type)
+        decode_time=decode_time+time.perf_counter()-start
+        start=time.perf_counter()
+        vector, labels = lf.graph_featurize(lf.FeatureGraph(y, rate), False)
+        feature_time=feature_time+time.perf_counter()-start
+        features.append(vector)
+
+    return np.array(features), 1000*decode_time/len(wavfiles), 1000*feature_time/len(wavfiles)
+
+# decode time (ms) of a whole recording, where resampling cost shows
+def decode_recording(wavfile, analysis_sr, resample_type, repeats=5):
+    start=time.perf_counter()
+    for i in range(repeats):
+        lf.load_audio(wavfile, lf.settings_sr(analysis_sr), resample_type)
+    return 1000*(time.perf_counter()-start)/repeats
+
+if __name__ == '__main__':
+    hostdir=os.path.dirname(os.path.abspath(__file__))
+    classes, wavfiles, targets = rc.labeled_files(hostdir)
+    folds=rc.cv_folds(targets)
+
+    # warm up librosa / numba so the first option is not charged for it
+    for analysis_sr, resample_type in options:
+        featurize_option(wavfiles[0:1], analysis_sr, resample_type)
+
+    results=list()
+    for analysis_sr, resample_type in options:
+        features, decode_ms, feature_ms = featurize_option(wavfiles, analysis_sr, resample_type)
+        recording_ms=decode_recording(hostdir+'/load_dir/fast.wav', analysis_sr, resample_type)
+        results.append((analysis_sr, resample_type, features, decode_ms, feature_ms, recording_ms))
+
+    reference=results[0][2]
+    model=rc.make_model().fit(reference, targets)
+
+    print('%s windows (%s) | reference: %s Hz, %s | %s-fold CV\n'%(len(wavfiles), ', '.join(classes), str(options[0][0]), options[0][1], str(folds)))
+    print('| analysis_sr | resample_type | 10 s file decode ms | window decode ms | window featurize ms | median feature drift | p95 feature drift | accuracy of reference model | CV accuracy |')
+    print('| --- | --- | --- | --- | --- | --- | --- | --- | --- |')
+    for analysis_sr, resample_type, features, decode_ms, feature_ms, recording_ms in results:
+        drift=np.abs(features-reference)/(np.abs(reference)+1e-8)
+        accuracy=np.mean(model.predict(features) == targets)
+        cv_accuracy=rc.cv_accuracy(features, targets)
+        print('| %s | %s | %.2f | %.2f | %.2f | %.2e | %.2e | %.3f | %.3f |'%(str(analysis_sr), resample_type, recording_ms, decode_ms, feature_ms,
+                                                                   np.median(drift), np.percentile(drift, 95), accuracy, cv_accuracy))
@@ -0,0 +1,149 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##             STREAM_FEATURES.PY             ##    
+================================================ 
+
+Featurizes live audio with librosa_features.StreamingFeaturizer, one feature
+vector per timesplit window (settings.json).
+
+replay: streams a .wav file through the featurizer in fixed-size blocks on
+one core, checks every window against featurizing the same samples offline,
+and reports the real-time factor (processing time / audio time) and the
+per-block latency.
+
+live: captures the default microphone with sounddevice and prints a line
+per featurized window.
+
+Usage: python3 stream_features.py replay ./load_dir/fast.wav [block size]
+       python3 stream_features.py live
+'''
+import os
+
+# measure on one core
+os.environ['OMP_NUM_THREADS']='1'
+os.environ['OPENBLAS_NUM_THREADS']='1'
+os.environ['MKL_NUM_THREADS']='1'
+os.environ['NUMBA_NUM_THREADS']='1'
+
+import sys, time
+import numpy as np
+import librosa_features as lf
+import event_detection as ed
+
+def replay(wavfile, timesplit, blocksize, sr, res_type):
+    y, sr = lf.load_audio(wavfile, sr, res_type)
+    streamer=lf.StreamingFeaturizer(sr, timesplit)
+
+    # build the filterbanks/windows + compile librosa's numba functions
+    lf.warm_up(sr, timesplit)
+
+    outputs=list()
+    latencies=list()
+    start=time.perf_counter()
+    for i in range(0, len(y), blocksize):
+        block_start=time.perf_counter()
+        outputs=outputs+streamer.consume(y[i:i+blocksize])
+        latencies.append(1000*(time.perf_counter()-block_start))
+    elapsed=time.perf_counter()-start
+    duration=len(y)/sr
+
+    # the stream must produce the same features as the offline windows
+    windows=lf.window_view(y, sr, timesplit)
+    for i in range(len(outputs)):
+        features, labels = lf.graph_featurize(lf.FeatureGraph(windows[i], sr), False)
+        assert np.array_equal(outputs[i][1], features), 'streamed window %s differs'%(str(i))
+
+    print('replayed %s (%.2f s @ %s Hz) in blocks of %s samples'%(wavfile, duration, str(sr), str(blocksize)))
+    print('%s windows of %s s, %s samples dropped'%(str(len(outputs)), str(timesplit), str(streamer.dropped)))
+    print('processing time: %.3f s -> real-time factor %.3f (1 core)'%(elapsed, elapsed/duration))
+    print('block latency: median %.2f ms, p95 %.2f ms, max %.2f ms (a block lasts %.2f ms)'%(np.median(latencies), np.percentile(latencies, 95),
+                                                                                          np.amax(latencies), 1000*blocksize/sr))
+
+def live(timesplit, blocksize, sr):
+    import sounddevice as sd
+    streamer=lf.StreamingFeaturizer(sr, timesplit)
+    lf.warm_up(sr, timesplit)
+
+    def callback(indata, frames, time_info, status):
+        streamer.write(indata)
+
+    # the audio callback only fills the ring buffer; featurizing happens here
+    with sd.InputStream(samplerate=sr, blocksize=blocksize, channels=1, callback=callback):
+        print('listening (ctrl+c to stop)...')
+        labels=lf.flat_labels()
+        while True:
+            for onset, features in streamer.featurize_ready():
+                print('%.2f s: RMSE mean %.4f, %s onsets (%s samples dropped)'%(onset, features[labels.index('RMSE_mean')],
+                                                                              str(int(features[0])), str(streamer.dropped)))
+            time.sleep(0.01)
+
+if __name__ == '__main__':
+    g=ed.read_settings(os.path.dirname(os.path.abspath(__file__))+'/settings.json')
+    timesplit=g['timesplit']
+    if timesplit == 'random':
+        timesplit=0.2
+    sr=lf.settings_sr(g['analysis_sr'])
+
+    if sys.argv[1] == 'replay':
+        if len(sys.argv) > 3:
+            blocksize=int(sys.argv[3])
+        else:
+            blocksize=1024
+        replay(sys.argv[2], timesplit, blocksize, sr, g['resample_type'])
+    elif sys.argv[1] == 'live':
+        if sr is None:
+            sr=lf.analysis_sr
+        live(timesplit, 1024, sr)
@@ -0,0 +1,60 @@
+import json, os, pickle
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+import event_detection as ed
+import librosa_features as lf
+from model_registry import ModelRegistry
+
+sr=22050
+timesplit=0.2
+settings={'timesplit': timesplit, 'feature_cache': False, 'feature_budget': 0}
+
+# 0.2 s windows of quiet + loud noise, taking turns
+def quiet_loud(windows=10):
+    rng=np.random.default_rng(0)
+    levels=np.tile([0.01, 0.5], windows//2)
+    return np.concatenate([level*rng.standard_normal(int(timesplit*sr)) for level in levels]).astype(np.float32)
+
+# a tree that splits quiet (class 0) from loud (class 1) windows on one
+# feature column, saved as the model name (.pickle + .json) in directory
+def write_model(directory, name, column, quiet, loud, stamp=None):
+    labels=lf.flat_labels()
+    features=np.zeros((2, len(labels)))
+    features[:,labels.index(column)]=[quiet, loud]
+    model=DecisionTreeClassifier().fit(features, [0, 1])
+    with open(os.path.join(directory, name+'.pickle'), 'wb') as f:
+        pickle.dump(model, f)
+    with open(os.path.join(directory, name+'.json'), 'w') as f:
+        json.dump({'accuracy': 1.0, 'feature_profile': 'full', 'feature_columns': [column]}, f)
+    if stamp is not None:
+        for path in [name+'.pickle', name+'.json']:
+            os.utime(os.path.join(directory, path), ns=(stamp, stamp))
+
+def window_events(records, name):
+    return [window['event'] for window in records['windows'] if window['model'] == name]
+
+# a model retrained on other columns gets those columns computed (not the
+# columns of the model it replaced, which would leave its column at 0)
+def test_retrained_model_columns(tmp_path):
+    y=quiet_loud()
+    write_model(tmp_path, 'quiet_loud_tree', 'mfcc_1_mean', -1e6, 1e6, stamp=10**18)
+    detection=ed.Detection(ModelRegistry(tmp_path), settings)
+    assert detection.feature_columns == ['mfcc_1_mean']
+    detection.detect(y, sr)
+
+    write_model(tmp_path, 'quiet_loud_tree', 'RMSE_mean', 0.01, 0.5, stamp=2*10**18)
+    records=detection.detect(y, sr)
+    assert detection.feature_columns == ['RMSE_mean']
+    assert window_events(records, 'quiet_loud_tree.pickle') == ['quiet', 'loud']*5
+
+# a model added to the folder is used from the next detection on
+def test_added_model(tmp_path):
+    y=quiet_loud()
+    write_model(tmp_path, 'quiet_loud_tree', 'RMSE_mean', 0.01, 0.5)
+    detection=ed.Detection(ModelRegistry(tmp_path), settings)
+    assert detection.names == ['quiet_loud_tree.pickle']
+
+    write_model(tmp_path, 'soft_hard_tree', 'RMSE_median', 0.01, 0.5)
+    records=detection.detect(y, sr)
+    assert detection.names == ['quiet_loud_tree.pickle', 'soft_hard_tree.pickle']
+    assert window_events(records, 'soft_hard_tree.pickle') == ['soft', 'hard']*5
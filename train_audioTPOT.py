@@ -62,12 +62,14 @@ Auto optimize the parameters for a classification model.
 Follows TPOT documentation
 https://github.com/EpistasisLab/tpot
 '''
-import json, os, random
+import json, os, pickle, random
 import numpy as np
 from tpot import TPOTClassifier
 from tpot import TPOTRegressor
 from sklearn.model_selection import train_test_split
 import librosa_features as lf 
+import event_detection as ed
+from model_registry import ModelRegistry, model_columns
 
 ## helper function
 def find_wav(listdir):
@@ -77,154 +79,233 @@ def find_wav(listdir):
             wavfiles.append(listdir[j])
     return wavfiles 
 
-def featurize_json(wavfile):
-    features, labels = lf.librosa_featurize(wavfile, False)
-    jsonfile=open(wavfile[0:-4]+'.json','w')
-    data={'features': features.tolist(),
-          'labels': labels}
-    json.dump(data,jsonfile)
-    jsonfile.close()
-
-    return features 
-
-## initialize directories and classes
-model_dir=os.getcwd()+'/models/'
-data_dir=os.getcwd()+'/data/'
-
-os.chdir(data_dir)
-mtype=input('classification (c) or regression (r) problem? \n').lower().replace(' ','')
-while mtype not in ['c','r', 'classification','regression']:
-    print('input not recognized')
-    mtype=input('is this classification (c) or regression (r) problem? \n').lower().replace(' ','')
-
-one=input('what is the name of class 1? \n')
-two=input('what is the name of class 2? \n')
-jsonfilename=one+'_'+two+'.json'
-onelist=list()
-twolist=list()
-
-if jsonfilename not in os.listdir():
-    os.chdir(one)
-    listdir=os.listdir()
-    wavfiles_one=find_wav(listdir)
-    for i in range(len(wavfiles_one)):
-        features=featurize_json(wavfiles_one[i])
-        onelist.append(features.tolist())
+# the stamp a file's rows are stored with: its mtime + size, so a file that
+# is replaced under the same name is featurized again
+def file_stamp(filename):
+    info=os.stat(filename)
+    return '%s:%s'%(str(info.st_mtime_ns), str(info.st_size))
+
+# featurize the .wav files of a class (in the current directory) that are not
+# in the feature store yet (or changed since), in a process pool (a corrupt
+# file is skipped instead of stopping training), and append them to the store
+# with their segment times from the label_files.py .JSON (nan if there is
+# none); overlapping segments are pooled from their recording, sharing stats
+# work. returns the (source, stamp) of every file of the class, to train on
+def featurize_store(wavfiles, label, store):
+    index=store.index()
+    stored=set(zip(index['source'], index['stamp']))
+    current=[(label+'/'+wavfile, file_stamp(wavfile)) for wavfile in wavfiles]
+    wavfiles=[wavfiles[i] for i in range(len(wavfiles)) if current[i] not in stored]
+    stamps=[stamp for source, stamp in current if (source, stamp) not in stored]
+    print('featurizing %s new files of %s'%(str(len(wavfiles)), label))
+    if len(wavfiles) == 0:
+        return current
+
+    if rhythm_context > 0 or overlapping == True:
+        features, labels, errors = featurize_context(wavfiles)
+    else:
+        features, labels, errors = lf.librosa_featurize_many(wavfiles, cache=cache, sr=analysis_sr, res_type=resample_type,
+                                                              profile=feature_profile, dtype=feature_dtype)
+    rows=list()
+    onsets=list()
+    offsets=list()
+    for i in range(len(wavfiles)):
+        if i in errors:
+            print('skipping %s (%s)'%(wavfiles[i], errors[i]))
+            continue
+        segment=dict()
+        if os.path.exists(wavfiles[i][0:-4]+'.json'):
+            segment=json.load(open(wavfiles[i][0:-4]+'.json'))
+        rows.append(i)
+        onsets.append(segment.get('start', np.nan))
+        offsets.append(segment.get('end', np.nan))
+
+    store.append(features[rows], [label+'/'+wavfiles[i] for i in rows], onsets, offsets, [label]*len(rows),
+                 [stamps[i] for i in rows])
+    return current
+
+# featurize labeled segments (with rhythm_context seconds of context) from the
+# recordings in ./processed they were cut from (the segment .JSON has their
+# times); same outputs as lf.librosa_featurize_many
+def featurize_context(wavfiles):
+    labels=lf.flat_labels(feature_profile)
+    features=np.full((len(wavfiles), len(labels)), np.nan, dtype=np.float32)
+    errors=dict()
+
+    # group the segments by recording (segments labeled before the source was
+    # stored are named <recording>_<number>.wav)
+    sources=dict()
+    for i in range(len(wavfiles)):
+        try:
+            segment=json.load(open(wavfiles[i][0:-4]+'.json'))
+            source=segment.get('source', wavfiles[i][0:wavfiles[i].rfind('_')]+'.wav')
+            if not os.path.exists(processed_dir+source):
+                raise FileNotFoundError('no recording %s in %s'%(source, processed_dir))
+            sources.setdefault(source, list()).append((i, segment['start'], segment['end']))
+        except Exception as e:
+            errors[i]='%s: %s'%(type(e).__name__, str(e))
+
+    for source in sources:
+        index=[i for i, start, end in sources[source]]
+        onsets=np.array([start for i, start, end in sources[source]])
+        offsets=np.array([end for i, start, end in sources[source]])
+        try:
+            features[index], labels = lf.librosa_featurize_segments(processed_dir+source, onsets, offsets, analysis_sr, resample_type,
+                                                                    profile=feature_profile, context=rhythm_context,
+                                                                    dtype=feature_dtype, cache=cache)
+        except Exception as e:
+            for i in index:
+                errors[i]='%s: %s'%(type(e).__name__, str(e))
+
+    return features, labels, errors
+
+# (guarded so the featurizing worker processes can import this script)
+if __name__ == '__main__':
+    ## load settings (reuse cached features when the class .JSON is rebuilt)
+    g=ed.read_settings('settings.json')
+    if g['feature_cache'] == True:
+        cache=lf.FeatureCache(max_mb=g['feature_cache_size'])
+    else:
+        cache=None
+    sr_setting=g['analysis_sr']
+    resample_type=g['resample_type']
+    feature_profile=g['feature_profile']
+    rhythm_context=g['rhythm_context']
+    overlapping=g['overlapping']
+    dtype_setting=g['feature_dtype']
+    feature_dtype=lf.settings_dtype(dtype_setting)
+    analysis_sr=lf.settings_sr(sr_setting)
+
+    ## initialize directories and classes
+    model_dir=os.getcwd()+'/models/'
+    data_dir=os.getcwd()+'/data/'
+    processed_dir=os.getcwd()+'/processed/'
 
     os.chdir(data_dir)
-    os.chdir(two)
-    listdir=os.listdir()
-    wavfiles_two=find_wav(listdir)
-    for i in range(len(wavfiles_two)):
-        features=featurize_json(wavfiles_two[i])
-        twolist.append(features.tolist())
-
+    mtype=input('classification (c) or regression (r) problem? \n').lower().replace(' ','')
+    while mtype not in ['c','r', 'classification','regression']:
+        print('input not recognized')
+        mtype=input('is this classification (c) or regression (r) problem? \n').lower().replace(' ','')
+
+    one=input('what is the name of class 1? \n')
+    two=input('what is the name of class 2? \n')
+    jsonfilename=one+'_'+two+'.json'
+
+    # featurized windows of every class are kept in a feature store per
+    # feature setup, so each file is only featurized once across models
+    store_dir='%s/feature_store/%s_%s_%s_%s_%s_v%s/'%(os.path.dirname(os.path.abspath(__file__)), feature_profile, str(sr_setting),
+                                                      resample_type, str(rhythm_context), str(overlapping), lf.feature_version)
+    store=lf.FeatureStore(store_dir, lf.flat_labels(feature_profile))
+    current=set()
+    for label in [one, two]:
+        os.chdir(data_dir)
+        os.chdir(label)
+        current.update(featurize_store(find_wav(os.listdir()), label, store))
     os.chdir(data_dir)
-    jsonfile=open(jsonfilename,'w')
-
-    # shuffle lists 
-    random.shuffle(onelist)
-    random.shuffle(twolist)
-    
-    # make it so classes have equal lengths 
-    if len(onelist) > len(twolist):
-        onelist=onelist[0:len(twolist)]
-    
-    elif len(twolist) > len(onelist):
-        twolist=twolist[0:len(onelist)]
-
-    print(len(twolist))
-    print(len(onelist))
-
-    data={one: onelist,
-          two: twolist}
-    json.dump(data,jsonfile)
-    jsonfile.close()
-
-try:
-    g=json.load(open(jsonfilename))
-    one=g[one]
-    two=g[two]
-    os.chdir(model_dir)
-
-    # now preprocess data 
-    alldata=list()
-    for i in range(len(one)):
-        alldata.append(one[i])
-    for i in range(len(two)):
-        alldata.append(two[i])
-        
-    labels=list()
-    for i in range(len(one)):
-        labels.append(0)
-    for i in range(len(two)):
-        labels.append(1)
-
-    alldata=np.asarray(alldata)
-    labels=np.asarray(labels)
-
-    # get train and test data 
-    X_train, X_test, y_train, y_test = train_test_split(alldata, labels, train_size=0.750, test_size=0.250)
-    if mtype in [' classification', 'c']:
-        tpot=TPOTClassifier(generations=5, population_size=50, verbosity=2, n_jobs=-1)
-        tpotname='%s_tpotclassifier.py'%(jsonfilename[0:-5])
-    elif mtype in ['regression','r']:
-        tpot = TPOTRegressor(generations=5, population_size=20, verbosity=2)
-        tpotname='%s_tpotregression.py'%(jsonfilename[0:-5])
-    tpot.fit(X_train, y_train)
-    accuracy=tpot.score(X_test,y_test)
-    tpot.export(tpotname)
-
-    # export data to .json format 
-    data={
-        'data': alldata.tolist(),
-        'labels': labels.tolist(),
-    }
-
-    jsonfilename='%s_.json'%(tpotname[0:-3])
-    jsonfile=open(jsonfilename,'w')
-    json.dump(data,jsonfile)
-    jsonfile.close()
-
-    # now edit the file and run it 
-    g=open(tpotname).read()
-    g=g.replace("import numpy as np", "import numpy as np \nimport json, pickle")
-    g=g.replace("tpot_data = pd.read_csv(\'PATH/TO/DATA/FILE\', sep=\'COLUMN_SEPARATOR\', dtype=np.float64)","g=json.load(open('%s'))\ntpot_data=g['labels']"%(jsonfilename))
-    g=g.replace("features = tpot_data.drop('target', axis=1).values","features=g['data']\n")
-    g=g.replace("tpot_data['target'].values", "tpot_data")
-    g=g.replace("results = exported_pipeline.predict(testing_features)", "print('saving classifier to disk')\nf=open('%s','wb')\npickle.dump(exported_pipeline,f)\nf.close()"%(jsonfilename[0:-6]+'.pickle'))
-    g1=g.find('exported_pipeline = ')
-    g2=g.find('exported_pipeline.fit(training_features, training_target)')
-    modeltype=g[g1:g2]
-    os.remove(tpotname)
-    t=open(tpotname,'w')
-    t.write(g)
-    t.close()
-    os.system('python3 %s'%(tpotname))
-
-    # now write an accuracy label 
-    os.remove(jsonfilename)
-
-    jsonfilename='%s.json'%(tpotname[0:-3])
-    print('saving .JSON file (%s)'%(jsonfilename))
-    jsonfile=open(jsonfilename,'w')
-    if mtype in ['classification', 'c']:
-        data={
-            'model name':jsonfilename[0:-5]+'.pickle',
-            'accuracy':accuracy,
-            'model type':'TPOTclassification_'+modeltype,
-        }
-    elif mtype in ['regression', 'r']:
-        data={
-            'model name':jsonfilename[0:-5]+'.pickle',
-            'accuracy':accuracy,
-            'model type':'TPOTregression_'+modeltype,
-        }
-
-    json.dump(data,jsonfile)
-    jsonfile.close()
+
+    try:
+        # the rows of both classes (shuffled, with classes of equal size) read
+        # from the memory-mapped store; only rows of the files in the class
+        # folders now, featurized from their current version, are used
+        index=store.index()
+        present=np.array([(source, stamp) in current for source, stamp in zip(index['source'], index['stamp'])], dtype=bool)
+        onerows=np.flatnonzero(present & (index['label'] == one))
+        tworows=np.flatnonzero(present & (index['label'] == two))
+        random.shuffle(onerows)
+        random.shuffle(tworows)
+        length=min(len(onerows), len(tworows))
+        onerows=onerows[0:length]
+        tworows=tworows[0:length]
+        print(len(tworows))
+        print(len(onerows))
+        os.chdir(model_dir)
+
+        # now preprocess data 
+        features=store.features()
+        alldata=np.asarray(np.concatenate([features[onerows], features[tworows]]), dtype=feature_dtype)
+        labels=np.concatenate([np.zeros(length, dtype=int), np.ones(length, dtype=int)])
+
+        # get train and test data 
+        X_train, X_test, y_train, y_test = train_test_split(alldata, labels, train_size=0.750, test_size=0.250)
+        if mtype in [' classification', 'c']:
+            tpot=TPOTClassifier(generations=5, population_size=50, verbosity=2, n_jobs=-1)
+            tpotname='%s_tpotclassifier.py'%(jsonfilename[0:-5])
+        elif mtype in ['regression','r']:
+            tpot = TPOTRegressor(generations=5, population_size=20, verbosity=2)
+            tpotname='%s_tpotregression.py'%(jsonfilename[0:-5])
+        tpot.fit(X_train, y_train)
+        accuracy=tpot.score(X_test,y_test)
+        tpot.export(tpotname)
+
+        # export data to .npy files (loaded memory-mapped by the pipeline script)
+        datafilename='%s_data.npy'%(tpotname[0:-3])
+        labelfilename='%s_labels.npy'%(tpotname[0:-3])
+        np.save(datafilename, alldata)
+        np.save(labelfilename, labels)
+
+        # now edit the file and run it 
+        g=open(tpotname).read()
+        g=g.replace("import numpy as np", "import numpy as np \nimport pickle")
+        g=g.replace("tpot_data = pd.read_csv(\'PATH/TO/DATA/FILE\', sep=\'COLUMN_SEPARATOR\', dtype=np.float64)","tpot_data=np.load('%s')"%(labelfilename))
+        g=g.replace("features = tpot_data.drop('target', axis=1).values","features=np.load('%s', mmap_mode='r')\n"%(datafilename))
+        g=g.replace("tpot_data['target'].values", "tpot_data")
+        g=g.replace("results = exported_pipeline.predict(testing_features)", "print('saving classifier to disk')\nf=open('%s','wb')\npickle.dump(exported_pipeline,f)\nf.close()"%(tpotname[0:-3]+'.pickle'))
+        g1=g.find('exported_pipeline = ')
+        g2=g.find('exported_pipeline.fit(training_features, training_target)')
+        modeltype=g[g1:g2]
+        os.remove(tpotname)
+        t=open(tpotname,'w')
+        t.write(g)
+        t.close()
+        os.system('python3 %s'%(tpotname))
+
+        # record the feature columns the pipeline depends on, so inference
+        # only computes the feature groups its models need
+        model=pickle.load(open(tpotname[0:-3]+'.pickle','rb'))
+        feature_columns=model_columns(model, lf.flat_labels(feature_profile))
+        print('model uses %s of %s features'%(str(len(feature_columns)), str(len(lf.flat_labels(feature_profile)))))
+
+        # now write an accuracy label 
+        os.remove(datafilename)
+        os.remove(labelfilename)
+
+        jsonfilename='%s.json'%(tpotname[0:-3])
+        print('saving .JSON file (%s)'%(jsonfilename))
+        jsonfile=open(jsonfilename,'w')
+        if mtype in ['classification', 'c']:
+            data={
+                'model name':jsonfilename[0:-5]+'.pickle',
+                'accuracy':accuracy,
+                'model type':'TPOTclassification_'+modeltype,
+                'analysis_sr':sr_setting,
+                'resample_type':resample_type,
+                'feature_version':lf.feature_version,
+                'feature_profile':feature_profile,
+                'rhythm_context':rhythm_context,
+                'feature_dtype':dtype_setting,
+                'feature_columns':feature_columns,
+            }
+        elif mtype in ['regression', 'r']:
+            data={
+                'model name':jsonfilename[0:-5]+'.pickle',
+                'accuracy':accuracy,
+                'model type':'TPOTregression_'+modeltype,
+                'analysis_sr':sr_setting,
+                'resample_type':resample_type,
+                'feature_version':lf.feature_version,
+                'feature_profile':feature_profile,
+                'rhythm_context':rhythm_context,
+                'feature_dtype':dtype_setting,
+                'feature_columns':feature_columns,
+            }
+
+        json.dump(data,jsonfile)
+        jsonfile.close()
+
+        # list the new model in the model manifest
+        ModelRegistry(model_dir).refresh()
                         
-except:    
-    print('error, please put %s in %s'%(jsonfile, data_dir))
-    print('note this can be done with train_audioclassify.py script')
+    except:    
+        print('error, please put .wav files of %s and %s in %s'%(one, two, data_dir))
+        print('note this can be done with train_audioclassify.py script')
 
@@ -0,0 +1,313 @@
+'''
+================================================ 
+          ACOUSTIC_EVENT_DETECTION REPOSITORY                     
+================================================ 
+
+repository name: acoustic_event_detection 
+repository version: 1.0 
+repository link: https://github.com/jim-schwoebel/acoustic_event_detection 
+author: Jim Schwoebel 
+author contact: js@neurolex.co 
+description: A repository for manually annotating files for creating labeled acoustic datasets for machine learning. 
+license category: opensource 
+license: Apache 2.0 license 
+organization name: NeuroLex Laboratories, Inc. 
+location: Seattle, WA 
+website: https://neurolex.ai 
+release date: 2019-04-26 
+
+This code (acoustic_event_detection) is hereby released under a Apache 2.0 license license. 
+
+For more information, check out the license terms below. 
+
+================================================ 
+                LICENSE TERMS                      
+================================================ 
+
+Copyright 2019 NeuroLex Laboratories, Inc. 
+Licensed under the Apache License, Version 2.0 (the "License"); 
+you may not use this file except in compliance with the License. 
+You may obtain a copy of the License at 
+
+     http://www.apache.org/licenses/LICENSE-2.0 
+
+Unless required by applicable law or agreed to in writing, software 
+distributed under the License is distributed on an "AS IS" BASIS, 
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. 
+See the License for the specific language governing permissions and 
+limitations under the License. 
+
+================================================ 
+                SERVICE STATEMENT                    
+================================================ 
+
+If you are using the code written for a larger project, we are 
+happy to consult with you and help you with deployment. Our team 
+has >10 world experts in Kafka distributed architectures, microservices 
+built on top of Node.js / Python / Docker, and applying machine learning to 
+model speech and text data. 
+
+We have helped a wide variety of enterprises - small businesses, 
+researchers, enterprises, and/or independent developers. 
+
+If you would like to work with us let us know @ develop@neurolex.co. 
+
+================================================ 
+##            WATCH_AUDIOTPOT.PY              ##    
+================================================ 
+
+Fingerprint audio models in a streaming folder, as a long-running daemon.
+
+Watches ./load_dir (with inotify on Linux, or by rescanning the folder every
+second elsewhere / with "poll") and queues every .wav file written or moved
+into it (and the .wav files there without a .json at startup, once their
+size + mtime stop changing, so a file still being copied is not modeled
+half-written). A pool of worker processes, each with the models of ./models
+loaded once, detects the events of the queued files with event_detection.py
+and writes the same .csv / .json outputs as load_audioTPOT.py (atomically,
+the .json last). The queue depth and throughput are printed every 10
+seconds.
+
+Usage: python3 watch_audioTPOT.py [workers] [poll]
+'''
+import collections, ctypes, ctypes.util, os, select, struct, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import librosa_features as lf
+import event_detection as ed
+from model_registry import ModelRegistry
+
+host_dir=os.getcwd()
+load_dir=host_dir+'/load_dir'
+model_dir=host_dir+'/models'
+report_interval=10
+poll_interval=1
+
+# inotify events of a file that was written + closed, or moved into the folder
+IN_CLOSE_WRITE=0x00000008
+IN_MOVED_TO=0x00000080
+
+class InotifyWatcher:
+    # names of the files finished in a folder, from Linux inotify (through libc)
+    def __init__(self, directory):
+        libc=ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        libc.inotify_add_watch.argtypes=[ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd=libc.inotify_init1(os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), 'inotify_add_watch failed on %s'%(directory))
+
+    # files finished within timeout seconds
+    def wait(self, timeout):
+        names=list()
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if len(ready) == 0:
+            return names
+        try:
+            data=os.read(self.fd, 64*1024)
+        except BlockingIOError:
+            return names
+        # struct inotify_event: wd, mask, cookie, len + a NUL padded name
+        position=0
+        while position < len(data):
+            wd, mask, cookie, length = struct.unpack_from('iIII', data, position)
+            position=position+16
+            names.append(os.fsdecode(data[position:position+length].rstrip(b'\0')))
+            position=position+length
+        return names
+
+class PollingWatcher:
+    # names of the files finished in a folder, by rescanning it (at most every
+    # interval seconds): a new file is finished once its size + mtime are the
+    # same in two scans in a row. With names, only those files are watched
+    # (e.g. the files in the folder at startup) instead of the new ones
+    def __init__(self, directory, interval=poll_interval, names=None):
+        self.directory=directory
+        self.interval=interval
+        self.names=names
+        self.stamps=dict()
+        self.scanned=0
+        if names is None:
+            self.reported=set(os.listdir(directory))
+        else:
+            self.reported=set()
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        names=list()
+        if time.time()-self.scanned < self.interval:
+            return names
+        self.scanned=time.time()
+        stamps=dict()
+        listdir=os.listdir(self.directory)
+        for name in listdir:
+            if name in self.reported or (self.names is not None and name not in self.names):
+                continue
+            try:
+                stat=os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            stamps[name]=(stat.st_size, stat.st_mtime_ns)
+            if self.stamps.get(name) == stamps[name]:
+                names.append(name)
+                self.reported.add(name)
+        self.stamps=stamps
+        # a file that is removed + written again is reported again
+        self.reported=self.reported & set(listdir)
+        return names
+
+def make_watcher(directory, poll=False):
+    if poll == False:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError, TypeError) as e:
+            print('inotify is not available (%s), polling %s instead'%(str(e), directory))
+    return PollingWatcher(directory)
+
+## worker processes
+# each worker reads settings.json, unpickles the models and warms up librosa
+# once, before its first file (models that change on disk are reloaded)
+def start_worker():
+    global detection
+    detection=ed.Detection(ModelRegistry(model_dir), ed.read_settings(host_dir+'/settings.json'))
+    for name in detection.names:
+        detection.models.get(name)
+    for profile in set(detection.profiles):
+        lf.warm_up(detection.analysis_sr, detection.timesplit, profile)
+
+def detect(filename):
+    start=time.time()
+    records=detection.detect(os.path.join(load_dir, filename))
+    # a file shorter than one window gets a .json with no events (so it is done)
+    ed.write_outputs(records, os.path.join(load_dir, filename[0:-4]+'.csv'), os.path.join(load_dir, filename[0:-4]+'.json'))
+    windows=0
+    if len(records['windows']) > 0:
+        windows=len(records['windows'])//len(detection.names)
+    return windows, time.time()-start
+
+def start_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, initializer=start_worker)
+
+def done_json(filename):
+    return os.path.exists(os.path.join(load_dir, filename[0:-4]+'.json'))
+
+################################################
+##                 Main scripts               ##    
+################################################
+if __name__ == '__main__':
+    workers=max(1, (os.cpu_count() or 2)//2)
+    if len(sys.argv) > 1 and sys.argv[1].isdigit():
+        workers=int(sys.argv[1])
+    if not os.path.isdir(load_dir):
+        os.mkdir(load_dir)
+    if len(ModelRegistry(model_dir).names()) == 0:
+        print('error, please put trained models (.pickle + .json) in %s'%(model_dir))
+        sys.exit(1)
+    watcher=make_watcher(load_dir, 'poll' in sys.argv)
+    # the .wav files left from before are queued once they stop changing
+    # (they may still be copied in)
+    left=sorted(name for name in os.listdir(load_dir) if name[-4:] == '.wav' and not done_json(name))
+    startup=PollingWatcher(load_dir, names=set(left))
+
+    # .wav files waiting for a worker
+    queue=collections.deque()
+    queued=set()
+    # the files that were running when a worker process died are run again
+    # one at a time in a one-worker pool (solo): the file that breaks it is
+    # the one that killed the worker, and only that file is skipped
+    suspects=collections.deque()
+    solo=None
+    alone=None
+    running=dict()
+    done=0
+    failed=0
+    windows=0
+    busy=0
+    # throughput is over the last report_interval
+    reported=time.time()
+    reported_done=0
+    reported_windows=0
+    print('watching %s with %s workers (%s files left from before)'%(load_dir, str(workers), str(len(left))))
+
+    executor=start_pool(workers)
+    try:
+        while True:
+            # queue new files (outputs + temporary files are not .wav)
+            if len(running) > 0:
+                timeout=0.1
+            else:
+                timeout=poll_interval
+            for name in startup.wait(0)+watcher.wait(timeout):
+                if name[-4:] == '.wav' and name not in queued and not done_json(name):
+                    queue.append(name)
+                    queued.add(name)
+
+            # keep every worker busy with one file + one more waiting; the
+            # rest wait in the queue (so new files are not behind a long backlog
+            # of submitted work if the pool restarts)
+            while len(queue) > 0 and len(running) < 2*workers:
+                name=queue.popleft()
+                running[executor.submit(detect, name)]=name
+            if alone is None and len(suspects) > 0:
+                if solo is None:
+                    solo=start_pool(1)
+                name=suspects.popleft()
+                alone=solo.submit(detect, name)
+                running[alone]=name
+            elif alone is None and solo is not None:
+                solo.shutdown(wait=False)
+                solo=None
+
+            broken=False
+            for future in [future for future in running if future.done()]:
+                name=running.pop(future)
+                ran_alone=future is alone
+                if ran_alone == True:
+                    alone=None
+                try:
+                    file_windows, seconds = future.result()
+                    done=done+1
+                    windows=windows+file_windows
+                    busy=busy+seconds
+                    queued.discard(name)
+                    print('detected %s (%s windows in %.2f s)'%(name, str(file_windows), seconds))
+                except BrokenProcessPool:
+                    if ran_alone == True:
+                        failed=failed+1
+                        queued.discard(name)
+                        print('error: a worker process died on %s, skipping it'%(name))
+                        solo.shutdown(wait=False, cancel_futures=True)
+                        solo=None
+                    else:
+                        broken=True
+                        suspects.append(name)
+                except Exception as e:
+                    failed=failed+1
+                    queued.discard(name)
+                    print('error: %s failed (%s: %s)'%(name, type(e).__name__, str(e)))
+
+            if broken == True:
+                # a worker process died (e.g. a decoder crash): start a new pool;
+                # every file still running in the old one is a suspect too
+                for future in [future for future in running if future is not alone]:
+                    suspects.append(running.pop(future))
+                executor.shutdown(wait=False, cancel_futures=True)
+                executor=start_pool(workers)
+
+            now=time.time()
+            if now-reported >= report_interval:
+                elapsed=now-reported
+                print('queue depth %s (%s running), %s done, %s failed, %.1f files/min, %.1f windows/s, %.2f s per file'%(
+                      str(len(queue)+len(suspects)+len(running)), str(len(running)), str(done), str(failed), 60*(done-reported_done)/elapsed,
+                      (windows-reported_windows)/elapsed, busy/max(done, 1)))
+                reported=now
+                reported_done=done
+                reported_windows=windows
+
+    except KeyboardInterrupt:
+        print('stopping (waiting for %s running files)'%(str(len(running))))
+        executor.shutdown(wait=True, cancel_futures=True)
+        if solo is not None:
+            solo.shutdown(wait=True, cancel_futures=True)